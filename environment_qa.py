@@ -17,22 +17,34 @@ AI Models:
 Technology Stack:
 - Video: HLS streams, YouTube embeds, EarthCamTV iframes
 - Browser: Playwright for JavaScript execution
-- Vector DB: ChromaDB for temporal RAG
+- Vector DB: FAISS + SQLite for temporal RAG
 """
 
+# Heavy dependencies (cv2, av, m3u8, playwright, sentence-transformers) are imported inside the methods
+# that use them, so intent-only/text-only paths don't pay their import cost
+import asyncio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
-import m3u8
-import cv2
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import time
 from urllib.parse import urljoin
-import json
+import orjson
 import base64
+import hashlib
+import io
+import mmap
 import os
-from playwright.sync_api import sync_playwright
-import asyncio
+import pathlib
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 
 # SiliconFlow API Configuration
 API_KEY = os.getenv("SILICONFLOW_API_KEY")
@@ -42,24 +54,738 @@ API_BASE = "https://api.siliconflow.cn/v1"
 TEXT_MODEL = "Qwen/Qwen2.5-7B-Instruct"  # Text analysis model
 VISION_MODEL = "Qwen/Qwen2.5-VL-72B-Instruct"  # Visual QA model (supports image understanding)
 
+# HTTP connection pool configuration (EarthCam and YouTube requests)
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_MAXSIZE = 32
+HTTP_RETRY = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+HTTP_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+HTTP_TIMEOUT = (3, 10)  # (connect, read) seconds, so a hung socket fails fast and gets retried
+HTTP_SEGMENT_TIMEOUT = (3, 20)  # Full TS segments are larger than pages and playlists
+LLM_CONNECT_RETRIES = 2  # Connection-level retries for the SiliconFlow HTTP/2 client
+
+# Worker threads for overlapping independent network/LLM calls
+MAX_WORKERS = 8
+CANDIDATE_TIMEOUT = 20  # Seconds to wait for candidate cameras to resolve a stream
+
+# Known popular city cameras (including YouTube redirects); keys normalized: lowercase, no spaces
+_KNOWN_CAMERAS = {
+    "london": (
+        "https://www.earthcam.com/world/england/london/abbeyroad/",
+        "https://www.earthcam.com/world/england/london/londoneye/",
+        "https://www.earthcam.com/world/england/london/trafalgarsquare/",
+    ),
+    "newyork": (
+        "https://www.earthcam.com/usa/newyork/timessquare/",
+        "https://www.earthcam.com/usa/newyork/statueofliberty/",
+    ),
+    "miami": (
+        "https://www.earthcam.com/usa/florida/miamibeach/",
+        "https://www.earthcam.com/usa/florida/miami/",
+    ),
+    "lasvegas": (
+        "https://www.earthcam.com/usa/nevada/lasvegas/",
+    ),
+    "chicago": (
+        "https://www.earthcam.com/usa/illinois/chicago/",
+    ),
+    "dublin": (
+        "https://www.earthcam.com/world/ireland/dublin/",
+    ),
+    "amsterdam": (
+        "https://www.earthcam.com/world/netherlands/amsterdam/",
+    ),
+    # Following cities contain YouTube live streams
+    "paris": (
+        "https://www.earthcam.com/world/france/paris/?cam=eiffeltower",
+        "https://www.earthcam.com/world/france/paris/",
+    ),
+    "tokyo": (
+        "https://www.earthcam.com/world/japan/tokyo/?cam=tokyoskytree",
+        "https://www.earthcam.com/world/japan/tokyo/",
+    ),
+    "sydney": (
+        "https://www.earthcam.com/world/australia/sydney/",
+    ),
+    "barcelona": (
+        "https://www.earthcam.com/world/spain/barcelona/",
+    ),
+    "rome": (
+        "https://www.earthcam.com/world/italy/rome/",
+    ),
+    "munich": (
+        "https://www.earthcam.com/world/germany/munich/",
+    ),
+    "dubai": (
+        "https://www.earthcam.com/world/unitedarabemirates/dubai/",
+    ),
+    "singapore": (
+        "https://www.earthcam.com/world/singapore/singapore/",
+    ),
+    "hongkong": (
+        "https://www.earthcam.com/world/china/hongkong/",
+    ),
+    "losangeles": (
+        "https://www.earthcam.com/usa/california/losangeles/",
+    ),
+    "sanfrancisco": (
+        "https://www.earthcam.com/usa/california/sanfrancisco/",
+    ),
+    "boston": (
+        "https://www.earthcam.com/usa/massachusetts/boston/",
+    ),
+    "washingtondc": (
+        "https://www.earthcam.com/usa/dc/",
+    ),
+    # South American cities (some use EarthCamTV iframe)
+    "riodejaneiro": (
+        "https://www.earthcam.com/world/brazil/riodejaneiro/",
+    ),
+}
+
+# Common abbreviations / Chinese names -> normalized _KNOWN_CAMERAS / CITY_TZ key,
+# resolved locally so they never need the LLM translator
+_CITY_ALIASES = {
+    'la': 'losangeles', 'nyc': 'newyork', 'ny': 'newyork', 'sf': 'sanfrancisco',
+    'hk': 'hongkong', 'dc': 'washingtondc', 'washington': 'washingtondc',
+    'vegas': 'lasvegas', 'rio': 'riodejaneiro', 'sãopaulo': 'saopaulo', 'bogotá': 'bogota',
+    'newdelhi': 'delhi',
+    '伦敦': 'london', '纽约': 'newyork', '迈阿密': 'miami', '拉斯维加斯': 'lasvegas',
+    '芝加哥': 'chicago', '都柏林': 'dublin', '阿姆斯特丹': 'amsterdam', '巴黎': 'paris',
+    '东京': 'tokyo', '悉尼': 'sydney', '巴塞罗那': 'barcelona', '罗马': 'rome',
+    '慕尼黑': 'munich', '迪拜': 'dubai', '新加坡': 'singapore', '香港': 'hongkong',
+    '洛杉矶': 'losangeles', '旧金山': 'sanfrancisco', '波士顿': 'boston',
+    '华盛顿': 'washingtondc', '里约热内卢': 'riodejaneiro',
+    '首尔': 'seoul', '曼谷': 'bangkok', '上海': 'shanghai', '北京': 'beijing',
+    '德里': 'delhi', '新德里': 'delhi', '孟买': 'mumbai', '马尼拉': 'manila', '雅加达': 'jakarta',
+    '墨尔本': 'melbourne', '布里斯班': 'brisbane', '奥克兰': 'auckland', '圣保罗': 'saopaulo',
+    '布宜诺斯艾利斯': 'buenosaires', '圣地亚哥': 'santiago', '利马': 'lima', '波哥大': 'bogota',
+    '开罗': 'cairo', '开普敦': 'capetown',
+}
+
+
+def _normalize_city(city):
+    """Normalized lookup key for a city name: lowercase, no spaces, aliases resolved"""
+    key = city.lower().replace(" ", "")
+    return _CITY_ALIASES.get(key, key)
+
+# IANA timezones for supported cities (keys normalized: lowercase, no spaces)
+CITY_TZ = {
+    'london': 'Europe/London',
+    'newyork': 'America/New_York',
+    'miami': 'America/New_York',
+    'lasvegas': 'America/Los_Angeles',
+    'chicago': 'America/Chicago',
+    'dublin': 'Europe/Dublin',
+    'amsterdam': 'Europe/Amsterdam',
+    'paris': 'Europe/Paris',
+    'tokyo': 'Asia/Tokyo',
+    'sydney': 'Australia/Sydney',
+    'barcelona': 'Europe/Madrid',
+    'rome': 'Europe/Rome',
+    'munich': 'Europe/Berlin',
+    'dubai': 'Asia/Dubai',
+    'singapore': 'Asia/Singapore',
+    'hongkong': 'Asia/Hong_Kong',
+    'losangeles': 'America/Los_Angeles',
+    'sanfrancisco': 'America/Los_Angeles',
+    'boston': 'America/New_York',
+    'washingtondc': 'America/New_York',
+    'riodejaneiro': 'America/Sao_Paulo',
+    'seoul': 'Asia/Seoul',
+    'bangkok': 'Asia/Bangkok',
+    'shanghai': 'Asia/Shanghai',
+    'beijing': 'Asia/Shanghai',
+    'delhi': 'Asia/Kolkata',
+    'mumbai': 'Asia/Kolkata',
+    'manila': 'Asia/Manila',
+    'jakarta': 'Asia/Jakarta',
+    'melbourne': 'Australia/Melbourne',
+    'brisbane': 'Australia/Brisbane',
+    'auckland': 'Pacific/Auckland',
+    'saopaulo': 'America/Sao_Paulo',
+    'buenosaires': 'America/Argentina/Buenos_Aires',
+    'santiago': 'America/Santiago',
+    'lima': 'America/Lima',
+    'bogota': 'America/Bogota',
+    'cairo': 'Africa/Cairo',
+    'capetown': 'Africa/Johannesburg',
+}
+
+# Local plan router (see _route_plan): gazetteer of supported cities, by display name
+KNOWN_CITIES = (
+    "London", "Paris", "Amsterdam", "Dublin", "Munich", "Barcelona", "Rome",
+    "New York", "Chicago", "Miami", "Las Vegas", "San Francisco", "Boston", "Washington DC",
+    "Los Angeles", "Tokyo", "Dubai", "Singapore", "Hong Kong", "Seoul", "Bangkok", "Shanghai",
+    "Delhi", "Mumbai", "Manila", "Jakarta", "Beijing", "Sydney", "Melbourne", "Auckland",
+    "Brisbane", "São Paulo", "Rio de Janeiro", "Buenos Aires", "Santiago", "Lima", "Bogotá",
+    "Cairo", "Cape Town",
+)
+_CITY_DISPLAY = {_normalize_city(name): name for name in KNOWN_CITIES}
+
+
+def _city_pattern(names, flags=0, boundary=r'\b'):
+    # Longest names first so a multi-word name ("New Delhi", "Washington DC") matches
+    # as a whole rather than as the shorter name inside it
+    alternation = '|'.join(re.escape(name).replace(r'\ ', r'\s*') for name in sorted(names, key=len, reverse=True))
+    return re.compile(f'{boundary}(?:{alternation}){boundary}', flags)
+
+
+_RE_CITY_NAME = _city_pattern(
+    [name.lower() for name in KNOWN_CITIES]
+    + [alias for alias in _CITY_ALIASES if alias.isascii() and len(alias) > 2]
+    + ['sao paulo', 'bogota', 'new delhi', 'washington dc'],
+    re.IGNORECASE
+)
+_RE_CITY_ABBREV = _city_pattern([alias.upper() for alias in _CITY_ALIASES if alias.isascii() and len(alias) <= 3
+                                 and alias not in ('rio',)])  # LA, NYC, SF, ... only in capitals
+_RE_CITY_CJK = _city_pattern([alias for alias in _CITY_ALIASES if not alias.isascii()], boundary='')
+_RE_CJK = re.compile(r'[一-鿿]')
+_RE_COMPARISON = re.compile(r'\b(?:compare[ds]?|comparison|vs\.?|versus|than|between)\b|比较|对比|相比', re.IGNORECASE)
+# Past/future time references and factual questions the live camera can't answer
+_RE_ROUTE_EXCLUDE = re.compile(
+    r"\b(?:yesterday|tomorrow|tonight|last|next|ago|later|will|won't|was|were|did|had|used to|going to|forecast\w*"
+    r"|histor\w*|usual(?:ly)?|typical(?:ly)?|average|climate|season\w*"
+    r"|how many|how much|why|population|live in)\b|'ll\b|\b(?:19|20)\d\d\b"
+    r"|昨天|前天|明天|后天|上周|下周|去年|明年|将来|预报|历史|通常|平均|为什么|多少|人口",
+    re.IGNORECASE
+)
+_RE_SPACES = re.compile(r'\s+')
+# Place lists and capitalized words; in a locally routed query they may only join or be gazetteer cities
+_RE_PLACE_LIST = re.compile(r'\s*(?:,|&|/|\b(?:and|or)\b|、|，|和|或|与|及)\s*', re.IGNORECASE)
+_RE_CAPITALIZED = re.compile(r'\b[A-Z][a-z]+')
+_CITY_MARK = '\0'  # Stands in for a matched city while the rest of the query is checked
+_RE_CITY_SEPARATOR = re.compile(f'(?<={_CITY_MARK}){_RE_PLACE_LIST.pattern}(?={_CITY_MARK})', re.IGNORECASE)
+# Observable-condition keywords per plan query_type, checked in this order
+_ROUTE_TOPICS = (
+    ('traffic', re.compile(r'\b(?:traffic|congest\w*|jam|cars?|vehicles?|roads?)\b|交通|堵车|拥堵', re.IGNORECASE)),
+    ('people', re.compile(r'\b(?:crowd\w*|busy|people|pedestrians?|tourists?)\b|人多|拥挤|人流', re.IGNORECASE)),
+    ('environmental', re.compile(r'\b(?:air quality|pollut\w*|smog|haze|hazy|visibility|pm2\.5)\b|空气|污染|雾霾|能见度', re.IGNORECASE)),
+    ('weather', re.compile(r'\b(?:weather|rain\w*|sunny|cloudy|clouds?|snow\w*|fog\w*|foggy|storm\w*|wet|dry|sky)\b|天气|下雨|晴|阴|雪', re.IGNORECASE)),
+)
+
+
+def _city_spans(text):
+    """(start, end, display name) of every gazetteer city named in text, in order of appearance"""
+    spans = []
+    for pattern in (_RE_CITY_NAME, _RE_CITY_ABBREV, _RE_CITY_CJK):
+        for m in pattern.finditer(text):
+            city = _CITY_DISPLAY.get(_normalize_city(_RE_SPACES.sub(' ', m.group(0))))
+            if city:
+                spans.append((m.start(), m.end(), city))
+    return sorted(spans)
+
+
+def _match_cities(text):
+    """Gazetteer cities named in text (display names, in order of appearance, deduplicated)"""
+    return list(dict.fromkeys(city for _, _, city in _city_spans(text)))
+
+
+def _names_other_places(text, spans):
+    """Whether text may name places besides the gazetteer cities at spans
+    
+    With the cities masked out, any list separator still left ("Rome or Milan",
+    "Paris, Texas") or a capitalized word that doesn't start a sentence ("Rio
+    Grande do Sul") points at a place the gazetteer doesn't know.
+    """
+    masked, pos = [], 0
+    for start, end, _ in spans:
+        if start >= pos:
+            masked += [text[pos:start], _CITY_MARK]
+            pos = end
+    masked = ''.join(masked) + text[pos:]
+    # Separators between two cities ("London and Paris", "A, B or C") are fine
+    masked = _RE_CITY_SEPARATOR.sub('', masked)
+    if _RE_PLACE_LIST.search(masked):
+        return True
+    for m in _RE_CAPITALIZED.finditer(masked):
+        before = masked[:m.start()].rstrip()
+        if before and before[-1] not in '.?!:':
+            return True
+    return False
+
+
+def _route_plan(user_query):
+    """Build the execution plan locally for "<known city> + <observable condition>" queries
+    
+    Returns the plan dict (same shape as the LLM plan), or None when the query
+    needs the LLM planner (unknown, misspelled or additional place names, no
+    observable topic, a past/future or factual question, ...).
+    """
+    if _RE_ROUTE_EXCLUDE.search(user_query):
+        return None
+    query_type = next((name for name, pattern in _ROUTE_TOPICS if pattern.search(user_query)), None)
+    if not query_type:
+        return None
+    
+    spans = _city_spans(user_query)
+    if not spans or _names_other_places(user_query, spans):
+        return None
+    cities = list(dict.fromkeys(city for _, _, city in spans))
+    
+    is_comparison = len(cities) > 1 or bool(_RE_COMPARISON.search(user_query))
+    if is_comparison and len(cities) < 2:
+        # Compared against a time, a place outside the gazetteer or an alias of the
+        # same city ("Delhi and New Delhi") - let the LLM decide
+        return None
+    return {
+        "needs_camera": True,
+        "cities": cities,
+        "is_comparison": is_comparison,
+        "query_language": "zh" if _RE_CJK.search(user_query) else "en",
+        "query_type": query_type,
+        "execution_strategy": f"Local route: {query_type} query for {', '.join(cities)}"
+    }
+
+
+# Intent cache: exact match on normalized text, plus optional embedding near-duplicate match
+INTENT_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+INTENT_SIMILARITY_THRESHOLD = 0.92
+INTENT_CACHE_MAX_SIMILAR = 512
+_RE_TEMPORAL_ANCHOR = re.compile(
+    r'\b(?:now|current(?:ly)?|today|tonight|yesterday|tomorrow|last week|this week)\b'
+)
+
+
+def _intent_cities(intent):
+    """Cities of a parsed intent/plan as gazetteer display names (unknown names kept as given)"""
+    names = intent.get('cities') or ([intent['city']] if intent.get('city') else [])
+    return {_CITY_DISPLAY.get(_normalize_city(name), name) for name in names if isinstance(name, str)}
+
+
+# Static system prompts. Kept byte-identical across calls (only the user turn varies),
+# so the backend's prefix/prompt cache can reuse them.
+PLAN_SYSTEM_PROMPT = """This is an EarthCam-based environmental monitoring system. Our PRIMARY PURPOSE is to answer questions using real-time camera images from cities worldwide.
+
+CORE PRINCIPLE: If the query mentions ANY city/location or forks about ANY observable condition (weather, traffic, people, environment, etc.), we SHOULD use camerfor.
+
+Only set needs_camera=false if:
+- Asking definitions/explanations (e.g., "What is PM2.5?", "How does photosynthesis work?")
+- Completely unrelated topics (e.g., "Who is Sun Wukong's mother?", "Recipe for pizza")
+- Historical facts without visual evidence needed
+
+For MOST queries about cities, current conditions, comparisons, environment → needs_camera=true
+
+Determine:
+1. Does this query need real-time camera images? (DEFAULT: YES for city/location/environment queries)
+2. Which cities are involved? (normalize: LA→Los Angeles, NYC→New York, Tokyo→Tokyo, Londn→London, etc.)
+3. Is this comparing multiple cities?
+4. What language to respond in?
+
+Return ONLY JSON:
+{
+    "needs_camera": true/false,
+    "cities": ["City1", "City2", ...],
+    "is_comparison": true/false,
+    "query_language": "en/zh/other",
+    "query_type": "environmental/weather/traffic/people/general",
+    "execution_strategy": "Brief description"
+}"""
+
+CITY_VISION_SYSTEM_PROMPT_EN = """You analyze real-time city camera images.
+
+Briefly describe:
+1. Weather conditions (clear/cloudy/rainy)
+2. Visibility and air quality
+3. Traffic and crowd conditions
+
+Answer concisely in English (3-5 sentences)."""
+
+CITY_VISION_SYSTEM_PROMPT_ZH = """You analyze real-time city camera images。
+
+Brief description：
+1. Weather conditions（clear/cloudy/rainy）
+2. Visibility and air quality
+3. Traffic and crowd conditions
+
+Answer concisely in Chinese（3-5sentences）。"""
+
+COMPARE_SYSTEM_PROMPT_EN = """You are given real-time camera frames from several cities, each preceded by its city name and local time.
+
+Compare the cities directly from what you see (weather, visibility, traffic, crowds - whichever the question is about) and answer the user's question with a clear comparative conclusion.
+
+Answer ONLY in English"""
+
+COMPARE_SYSTEM_PROMPT_ZH = """You are given real-time camera frames from several cities, each preceded by its city name and local time。
+
+Compare the cities directly from what you see (weather, visibility, traffic, crowds - whichever the question is about) and answer the user's question with a clear comparative conclusion。
+
+Answer ONLY in Chinese"""
+
+FINAL_SYSTEM_PROMPT_EN = """Bfored on the information provided by the user, answer the user's question in English.
+
+Requirements:
+1. If ALL cities have no camera data:
+   - Honestly explain EarthCam camerfor are currently unavailable
+   - **Proactively provide alternatives**:
+     * Suggest checking official local weather websites
+     * Suggest using Google Maps real-time traffic layer
+     * Suggest checking local environmental agency air quality monitoring data
+     * Provide general insights based on the city's typical characteristics (e.g., LA usually has moderate air quality, heavy traffic, etc.)
+   
+2. If some cities have camera data, explain honestly and answer based on available data
+
+3. If it's a comparison question, provide clear comparative conclusions
+
+4. Answer professionally and constructively, don't just say "no data available"
+
+5. Answer ONLY in English"""
+
+FINAL_SYSTEM_PROMPT_ZH = """Bfored on the information provided by the user, answer user's question in Chinese。
+
+Requirements：
+1. If all cities have no camera data：
+   - Honestly explain EarthCam camerfor are currently unavailable
+   - **Proactively provide alternatives**：
+     * Suggest checking official local weather websites
+     * Suggest using Google Maps real-time traffic layer
+     * Suggest checking local environmental agency air quality monitoring data
+     * Provide general advice based on typical city characteristics（such as Los Angeles typically has average air quality, traffic congestion, etc.）
+   
+2. If some cities have camera data, explain honestly and answer based on available data
+
+3. If comparison question, provide clear comparative conclusions
+
+4. Answer professionally and constructively, don't just say"no data"
+
+5. Answer ONLY in Chinese"""
+
+# JSON schemas for structured (response_format) replies. Sent with "strict": true, which
+# requires every property to be listed in "required" and additionalProperties false
+PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "needs_camera": {"type": "boolean"},
+        "cities": {"type": "array", "items": {"type": "string"}},
+        "is_comparison": {"type": "boolean"},
+        "query_language": {"type": "string"},
+        "query_type": {"type": "string", "enum": ["environmental", "weather", "traffic", "people", "general"]},
+        "execution_strategy": {"type": "string"}
+    },
+    "required": ["needs_camera", "cities", "is_comparison", "query_language", "query_type", "execution_strategy"],
+    "additionalProperties": False
+}
+LANDMARKS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "landmarks": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["landmarks"],
+    "additionalProperties": False
+}
+
+# Lookup cache lifetimes (seconds)
+CAMERA_CACHE_TTL = 24 * 3600  # City -> camera URLs, also persisted to SEARCH_CACHE_PATH
+TZ_CACHE_TTL = 3600      # City -> UTC offset (local time itself is always recomputed)
+
+# Persistent LLM response cache (shared across runs), keyed by the full request payload
+LLM_CACHE_PATH = pathlib.Path.home() / ".cache" / "earthcamqa" / "llm.db"
+LLM_CACHE_TTL = 30 * 24 * 3600
+# Only near-deterministic calls are cached by default (planning, intent, landmark and
+# translation prompts run at <= 0.3); sampled answers describe the current moment
+LLM_CACHE_MAX_TEMPERATURE = 0.3
+# Capture-time captions ("YYYY-MM-DD HH:MM:SS") in vision prompts, keyed only to the hour:
+# the same frame (a reused capture, an unchanged thumbnail) comes back with a later caption
+_RE_CAPTION_TIME = re.compile(rb'(\d{4}-\d{2}-\d{2} \d{2}):\d{2}:\d{2}')
+SEARCH_CACHE_PATH = pathlib.Path.home() / ".cache" / "earthcamqa" / "search.json"
+# Verified city -> camera URLs directory built offline by scripts/build_camera_index.py
+CAMERA_INDEX_PATH = pathlib.Path(__file__).resolve().parent / "data" / "cameras.json"
+
+# Captured frame storage and encoding: downscale + recompress to shrink the vision API payload
+CAPTURE_DIR = "captured_images"
+VISION_MAX_SIDE = 1024
+VISION_JPEG_QUALITY = 75
+# Vision "detail" tier per plan query_type: sky/haze reads fine at low res, counting cars/people needs high
+VISION_DETAIL = {'weather': 'low', 'environmental': 'low', 'traffic': 'high', 'people': 'high'}
+TS_PREFIX_BYTES = 256 * 1024  # Leading bytes of a TS segment fetched to find its first keyframe
+ENCODED_IMAGE_CACHE_SIZE = 16  # Recent captures kept in memory as ready-to-send data URIs
+CAPTURE_CACHE_TTL = 60  # Seconds a camera's last capture is reused instead of re-capturing
+
+# Chromium launch flags for the shared headless browser
+BROWSER_ARGS = ['--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
+# Resource types the browser never needs for stream discovery (scripts/xhr/fetch/documents still load)
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'stylesheet', 'font', 'media'})
+BROWSER_POLL_MS = 250       # Poll interval while waiting for the player to request a stream
+BROWSER_RACE_TIMEOUT = 20   # Seconds extract_hls_url waits for the browser fallback
+
+
+def _block_heavy_resources(route):
+    """Playwright route handler: abort resources that don't affect stream discovery"""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+# Precompiled patterns for camera page scraping
+_RE_CAMERA_LINK = re.compile(r'href="(https://www\.earthcam\.com/[^"]+/)"')
+_RE_M3U8 = re.compile(r'(https?://[^\s"\'<>]+\.m3u8[^\s"\'<>]*)')
+_RE_YT = re.compile(r'(?:youtube\.com/embed/|youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})')
+_RE_YT_URL_ID = re.compile(r'(?:embed/|watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})')
+_RE_IFRAME = re.compile(r'<iframe[^>]+src=["\']([^"\']+)["\']', re.IGNORECASE)
+_RE_HTML5_DOMAIN = re.compile(r'html5_streamingdomain":"([^"]+)"')
+_RE_HTML5_PATH = re.compile(r'html5_streampath":"([^"]+)"')
+_RE_PLAYER_FILE = re.compile(r'"file"\s*:\s*"([^"]+\.m3u8[^"]*)"')
+
+
+def _fast_resize(frame, max_side=VISION_MAX_SIDE):
+    """Shrink a BGR frame so its longer side is at most max_side (never upscales)
+    
+    cv2's INTER_AREA path is SIMD-vectorized and the best filter for downscaling.
+    """
+    import cv2
+    
+    h, w = frame.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1.0:
+        return frame
+    return cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+_print_lock = threading.Lock()
+
+
+def _safe_print(*args, **kwargs):
+    """print() that keeps lines from concurrent city workers from interleaving"""
+    with _print_lock:
+        print(*args, **kwargs)
+
+
+def _load_camera_index(path):
+    """Read a camera index file into {normalized city: [urls]}, {} if missing or unreadable"""
+    try:
+        index = orjson.loads(pathlib.Path(path).read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+    return {_normalize_city(city): urls for city, urls in index.get('cameras', {}).items() if urls}
+
+
+def _extract_json(text):
+    """Return the first balanced {...} object in text (string-aware), or None
+    
+    Single linear scan; unlike a greedy regex it stops at the matching brace,
+    so trailing prose containing braces doesn't break JSON parsing.
+    """
+    if not text:
+        return None
+    start = text.find('{')
+    if start < 0:
+        return None
+    
+    depth = 0
+    in_str = False
+    esc = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if esc:
+            esc = False
+        elif c == '\\':
+            esc = in_str
+        elif c == '"':
+            in_str = not in_str
+        elif in_str:
+            continue
+        elif c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+# JSON replies are cut out with _extract_json rather than a precompiled r'\{.*\}' search:
+# the greedy pattern runs to the last '}' in the reply, so trailing prose with braces broke parsing.
+def _parse_json_reply(text):
+    """orjson.loads(text), retried on the first {...} in text when the reply isn't bare JSON
+    
+    Raises orjson.JSONDecodeError if neither parses.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        blob = _extract_json(text)
+        if blob is None:
+            raise
+        return orjson.loads(blob)
+
+
+class _LLMResponseCache:
+    """SQLite-backed response store: sha256(request payload) -> reply text"""
+    
+    def __init__(self, path=LLM_CACHE_PATH):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by the worker threads, serialized by a lock
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+    
+    @staticmethod
+    def key(data, hourly_captions=False):
+        """Cache key for a chat completion payload (model, messages incl. images, temperature, ...)
+        
+        hourly_captions truncates timestamps in the payload to the hour (see _RE_CAPTION_TIME).
+        """
+        blob = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+        if hourly_captions:
+            blob = _RE_CAPTION_TIME.sub(rb'\1', blob)
+        return hashlib.sha256(blob).hexdigest()
+    
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def set(self, key, response, ttl=LLM_CACHE_TTL):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, time.time() + ttl)
+            )
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
 class EarthCamQA:
     """Main class for the Environmental QA System"""
     
-    def __init__(self, api_key=API_KEY):
+    def __init__(self, api_key=API_KEY, use_cache=True, camera_index=CAMERA_INDEX_PATH, request_limiter=None,
+                 max_workers=MAX_WORKERS):
         self.api_key = api_key
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        
+        # SiliconFlow client: HTTP/2 multiplexes concurrent text/vision calls over one TLS connection.
+        # It is the only client carrying the API key.
+        self._llm_client = httpx.Client(
+            base_url=API_BASE,
+            headers=self.headers,
+            timeout=httpx.Timeout(90.0, connect=10.0),
+            transport=httpx.HTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+                retries=LLM_CONNECT_RETRIES
+            )
+        )
+        
+        # Shared session for EarthCam/YouTube: keeps TCP/TLS connections alive per host across calls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_CONNECTIONS,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            max_retries=HTTP_RETRY
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({'User-Agent': HTTP_USER_AGENT})
+        # Optional rate limiter (any object with acquire()), charged once per EarthCam
+        # search or camera page request, whether static or in the browser
+        self._request_limiter = request_limiter
+        
+        # Thread pool for running independent I/O-bound calls concurrently (candidate camera
+        # pages, search terms, thumbnails); callers driving many cities at once size it up
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        
+        # Persistent Playwright browser, launched lazily and owned by a single thread
+        self._pw = None
+        self._browser = None
+        self._browser_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playwright")
+        
+        # Output directory for captured frames, created once
+        self._capture_dir = pathlib.Path(CAPTURE_DIR)
+        self._capture_dir.mkdir(exist_ok=True)
+        # camera URL hash -> most recent capture, shared across processes (see _cached_capture)
+        self._capture_index_path = self._capture_dir / "capture_index.json"
+        self._capture_index_lock = threading.Lock()
+        
+        # image_path -> base64 data URI for recent captures, lets call_llm_vision skip the disk read
+        self._encoded_images = OrderedDict()
+        
+        # Offline camera directory (camera_index=None disables it, e.g. while rebuilding it)
+        self._camera_index = _load_camera_index(camera_index) if camera_index else {}
+        # TTL caches: normalized key -> (expiry_ts, value)
+        self._camera_cache = self._load_search_cache()
+        self._camera_cache_lock = threading.Lock()
+        self._tz_cache = {}
+        
+        # Persistent LLM response cache, disabled with use_cache=False (--no-cache)
+        self._llm_cache = None
+        if use_cache:
+            try:
+                self._llm_cache = _LLMResponseCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"  ⚠ LLM cache unavailable: {str(e)}")
+        
+        # Intent caches (see analyze_user_intent); embedder is loaded on first use
+        # (None: not loaded yet, False: sentence-transformers unavailable). Subclasses that
+        # already hold an INTENT_EMBED_MODEL encoder can assign it instead.
+        self._intent_cache_exact = {}
+        self._intent_cache_similar = []
+        self._intent_embedder = None
+    
+    def _throttle(self):
+        """Wait for the request limiter (if any) before an EarthCam request"""
+        if self._request_limiter is not None:
+            self._request_limiter.acquire()
+    
+    def _memo(self, cache, key, ttl, fn, on_store=None):
+        """Return cache[key] while fresh, otherwise call fn() and cache a non-empty result for ttl seconds"""
+        entry = cache.get(key)
+        now = time.time()
+        if entry and now < entry[0]:
+            return entry[1]
+        value = fn()
+        if value:
+            cache[key] = (now + ttl, value)
+            if on_store:
+                on_store()
+        return value
     
     def get_local_time_from_llm(self, city):
         """Get city's current local time using LLM"""
-        utc_time = datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else None)
-        if utc_time.tzinfo is None:
-            # Python < 3.11 fallback
-            from datetime import timezone
-            utc_time = datetime.now(timezone.utc)
+        utc_time = datetime.now(timezone.utc)
+        utc_time_str = utc_time.strftime('%Y-%m-%d %H:%M:%S UTC')
+        
+        # Known cities are resolved locally, no LLM call needed
+        city_key = _normalize_city(city)
+        tz_name = CITY_TZ.get(city_key)
+        if tz_name:
+            try:
+                local_time = utc_time.astimezone(ZoneInfo(tz_name))
+                return local_time.strftime('%Y-%m-%d %H:%M:%S'), local_time.tzname()
+            except ZoneInfoNotFoundError:
+                pass
+        
+        # Only the UTC offset is cached, local time is recomputed from it on every call
+        tz_info = self._memo(self._tz_cache, city_key, TZ_CACHE_TTL,
+                             lambda: self._lookup_utc_offset(city, utc_time))
+        if tz_info:
+            offset, timezone_str = tz_info
+            local_time = (utc_time + offset).strftime('%Y-%m-%d %H:%M:%S')
+            return local_time, timezone_str
         
+        # If fails, return UTC time for fallback
+        return utc_time_str.replace(' UTC', ''), 'UTC'
+    
+    def _lookup_utc_offset(self, city, utc_time):
+        """Ask the LLM for a city's local time, returns (utc_offset, timezone_name) or None"""
         utc_time_str = utc_time.strftime('%Y-%m-%d %H:%M:%S UTC')
         
         prompt = f"""Current UTC time is: {utc_time_str}
@@ -74,22 +800,123 @@ Please return ONLY a JSON object in this exact format:
 
 No explanations, just the JSON."""
         
-        response = self.call_llm_text(prompt, temperature=0.1)
+        # The prompt embeds the current UTC time, so a persisted reply could never be reused
+        response = self.call_llm_text(prompt, temperature=0.1, cache=False)
         
         if response:
             try:
-                json_match = re.search(r'\{.*\}', response, re.DOTALL)
-                if json_match:
-                    time_info = json.loads(json_match.group())
-                    return time_info.get('local_time'), time_info.get('timezone')
-            except:
+                blob = _extract_json(response)
+                if blob:
+                    time_info = orjson.loads(blob)
+                    local_time = datetime.strptime(time_info.get('local_time'), '%Y-%m-%d %H:%M:%S')
+                    # Round to the nearest 15 minutes to absorb the request latency
+                    seconds = (local_time - utc_time.replace(tzinfo=None)).total_seconds()
+                    offset = timedelta(seconds=round(seconds / 900) * 900)
+                    return offset, time_info.get('timezone')
+            except (ValueError, TypeError, AttributeError):
                 pass
         
-        # If fails, return UTC time for fallback
-        return utc_time_str.replace(' UTC', ''), 'UTC'
+        return None
+        
+    def call_llm_text(self, prompt, system_prompt=None, temperature=0.7, cache=None, stream=False,
+                      json_schema=None):
+        """Call text LLM
+        
+        With stream=True the reply is printed to stdout token by token as it
+        arrives (and still returned in full); not for JSON-returning prompts.
+        json_schema constrains the reply to a JSON document matching that schema.
+        cache: True/False to force the on-disk response cache on or off; by default
+        only replies at temperature <= LLM_CACHE_MAX_TEMPERATURE are cached.
+        """
+        data = self._text_request(prompt, system_prompt, temperature, json_schema)
+        key, cached = self._cache_lookup(data, cache)
+        if cached is not None:
+            if stream:
+                print(cached)
+            return cached
+        try:
+            if not stream:
+                response = self._llm_client.post("/chat/completions", content=orjson.dumps(data), timeout=60)
+                return self._cache_store(key, self._parse_text_response(response))
+            
+            with self._llm_client.stream("POST", "/chat/completions",
+                                         content=orjson.dumps(dict(data, stream=True)), timeout=60) as response:
+                if response.status_code != 200:
+                    response.read()
+                    return self._parse_text_response(response)
+                parts = []
+                for line in response.iter_lines():
+                    self._print_stream_delta(line, parts)
+            print()
+            return self._cache_store(key, ''.join(parts) or None)
+        except Exception as e:
+            print(f"  ✗ LLM call failed: {str(e)}")
+            return None
+    
+    async def call_llm_text_async(self, client, prompt, system_prompt=None, temperature=0.7, cache=None, stream=False,
+                                  json_schema=None):
+        """Call text LLM on an AsyncClient from _async_llm_client() (options as in call_llm_text)"""
+        data = self._text_request(prompt, system_prompt, temperature, json_schema)
+        key, cached = self._cache_lookup(data, cache)
+        if cached is not None:
+            if stream:
+                print(cached)
+            return cached
+        try:
+            if not stream:
+                response = await client.post("/chat/completions", content=orjson.dumps(data), timeout=60)
+                return self._cache_store(key, self._parse_text_response(response))
+            
+            async with client.stream("POST", "/chat/completions",
+                                     content=orjson.dumps(dict(data, stream=True)), timeout=60) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    return self._parse_text_response(response)
+                parts = []
+                async for line in response.aiter_lines():
+                    self._print_stream_delta(line, parts)
+            print()
+            return self._cache_store(key, ''.join(parts) or None)
+        except Exception as e:
+            print(f"  ✗ LLM call failed: {str(e)}")
+            return None
+    
+    def _print_stream_delta(self, line, parts):
+        """Handle one server-sent event line of a streamed completion: print and collect its text"""
+        if not line.startswith('data:'):
+            return
+        payload = line[5:].strip()
+        if not payload or payload == '[DONE]':
+            return
+        choices = orjson.loads(payload).get('choices')
+        if choices:
+            delta = (choices[0].get('delta') or {}).get('content')
+            if delta:
+                print(delta, end='', flush=True)
+                parts.append(delta)
+    
+    def _cache_lookup(self, data, cache=None):
+        """Return (key, cached reply) for a request payload; key is None when caching is off
         
-    def call_llm_text(self, prompt, system_prompt=None, temperature=0.7):
-        """Call text LLM"""
+        cache=None caches by temperature (see LLM_CACHE_MAX_TEMPERATURE). Vision calls
+        pass True: their key covers the frame bytes, so a hit is the same image, and
+        the caption with its capture time cut to the hour.
+        """
+        if cache is None:
+            cache = data["temperature"] <= LLM_CACHE_MAX_TEMPERATURE
+        if not cache or not self._llm_cache:
+            return None, None
+        key = _LLMResponseCache.key(data, hourly_captions=data["model"] == VISION_MODEL)
+        return key, self._llm_cache.get(key)
+    
+    def _cache_store(self, key, response):
+        """Persist a successful reply under key (no-op without a key), returns the reply"""
+        if key and response:
+            self._llm_cache.set(key, response)
+        return response
+    
+    def _text_request(self, prompt, system_prompt, temperature, json_schema=None):
+        """Build the chat completion payload for the text model"""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -101,91 +928,257 @@ No explanations, just the JSON."""
             "temperature": temperature,
             "max_tokens": 2000
         }
+        if json_schema:
+            data["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": json_schema, "strict": True}
+            }
+        return data
+    
+    def _parse_text_response(self, response):
+        """Return the text model's reply, None on API error"""
+        result = orjson.loads(response.content)
         
+        # Check API error
+        if 'error' in result:
+            print(f"  ✗ API error: {result['error']}")
+            return None
+        
+        if 'choices' not in result or not result['choices']:
+            print(f"  ✗ API response abnormal: {result}")
+            return None
+        
+        return result['choices'][0]['message']['content']
+    
+    def _image_data_url(self, image_path, image_url=None):
+        """Return a data: URI for image_path (or the given image_url), None if unavailable"""
+        # Reuse the in-memory encoding of a fresh capture when available
+        if image_path and image_path in self._encoded_images:
+            return self._encoded_images[image_path]
+        # Otherwise read and encode image (mmap avoids an intermediate bytes copy of the file)
+        if image_path and os.path.exists(image_path) and os.path.getsize(image_path) > 0:
+            with open(image_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return (b'data:image/jpeg;base64,' + base64.b64encode(mm)).decode('ascii')
+        return image_url
+    
+    def call_llm_vision(self, image_path, question, image_url=None, detail=None, system_prompt=None):
+        """Call vision LLM (detail: optional "low"/"high" image resolution tier)"""
+        content = self._vision_content(image_path, question, image_url, detail)
+        if not content:
+            return None
+        return self._post_vision(content, system_prompt=system_prompt)
+    
+    async def call_llm_vision_async(self, client, image_path, question, image_url=None, detail=None,
+                                    system_prompt=None):
+        """Call vision LLM on an AsyncClient from _async_llm_client()"""
+        content = self._vision_content(image_path, question, image_url, detail)
+        if not content:
+            return None
+        
+        data = self._vision_request(content, system_prompt=system_prompt)
+        key, cached = self._cache_lookup(data, cache=True)
+        if cached is not None:
+            return cached
         try:
-            response = requests.post(
-                f"{API_BASE}/chat/completions",
-                headers=self.headers,
-                json=data,
-                timeout=60
-            )
-            result = response.json()
-            
-            # Check API error
-            if 'error' in result:
-                print(f"  ✗ API error: {result['error']}")
-                return None
-            
-            if 'choices' not in result or not result['choices']:
-                print(f"  ✗ API response abnormal: {result}")
-                return None
-            
-            return result['choices'][0]['message']['content']
+            response = await client.post("/chat/completions", content=orjson.dumps(data), timeout=90)
+            return self._cache_store(key, self._parse_vision_response(response))
+        except httpx.TimeoutException:
+            print(f"  ✗ Vision LLM call timeout")
+            return None
         except Exception as e:
-            print(f"  ✗ LLM call failed: {str(e)}")
+            print(f"  ✗ Vision LLM call failed: {str(e)}")
             return None
     
-    def call_llm_vision(self, image_path, question, image_url=None):
-        """Call vision LLM"""
-        # Read and encode image
-        if image_path and os.path.exists(image_path):
-            with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-            image_url = f"data:image/jpeg;base64,{image_data}"
-        
+    def _vision_content(self, image_path, question, image_url=None, detail=None):
+        """Image + question content parts for a single-question vision call, None without an image"""
+        image_url = self._image_data_url(image_path, image_url)
         if not image_url:
             return None
         
-        messages = [
+        image = {"url": image_url}
+        if detail:
+            image["detail"] = detail
+        return [
             {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": image_url}
-                    },
-                    {
-                        "type": "text",
-                        "text": question
-                    }
-                ]
+                "type": "image_url",
+                "image_url": image
+            },
+            {
+                "type": "text",
+                "text": question
             }
         ]
+    
+    def call_llm_vision_compare(self, images, prompt, system_prompt=None):
+        """Ask one question about several images in a single request
         
-        data = {
-            "model": VISION_MODEL,
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 1000
-        }
+        images is a list of (image_path, label) pairs; each image is preceded by
+        its label so the model can tell them apart.
+        """
+        content = self._compare_content(images, prompt)
+        if not content:
+            return None
+        return self._post_vision(content, max_tokens=2000, system_prompt=system_prompt)
+    
+    async def call_llm_vision_compare_async(self, client, images, prompt, system_prompt=None):
+        """call_llm_vision_compare on an AsyncClient from _async_llm_client()"""
+        content = self._compare_content(images, prompt)
+        if not content:
+            return None
         
+        data = self._vision_request(content, max_tokens=2000, system_prompt=system_prompt)
+        key, cached = self._cache_lookup(data, cache=True)
+        if cached is not None:
+            return cached
         try:
-            response = requests.post(
-                f"{API_BASE}/chat/completions",
-                headers=self.headers,
-                json=data,
-                timeout=90
-            )
-            result = response.json()
-            
-            # Print detailed error info
-            if 'error' in result:
-                print(f"  API error: {result['error']}")
-                return None
-            
-            if 'choices' not in result:
-                print(f"  API response abnormal: {result}")
+            response = await client.post("/chat/completions", content=orjson.dumps(data), timeout=90)
+            return self._cache_store(key, self._parse_vision_response(response))
+        except httpx.TimeoutException:
+            print(f"  ✗ Vision LLM call timeout")
+            return None
+        except Exception as e:
+            print(f"  ✗ Vision LLM call failed: {str(e)}")
+            return None
+    
+    def _compare_content(self, images, prompt):
+        """Labeled image parts followed by the prompt, None unless every image is available"""
+        content = []
+        for image_path, label in images:
+            image_url = self._image_data_url(image_path)
+            if not image_url:
                 return None
-                
-            return result['choices'][0]['message']['content']
-        except requests.exceptions.Timeout:
+            content.append({"type": "text", "text": label})
+            content.append({"type": "image_url", "image_url": {"url": image_url}})
+        content.append({"type": "text", "text": prompt})
+        return content
+    
+    def _post_vision(self, content, max_tokens=1000, system_prompt=None):
+        """Send one user message with image/text content parts to the vision model"""
+        data = self._vision_request(content, max_tokens, system_prompt)
+        key, cached = self._cache_lookup(data, cache=True)
+        if cached is not None:
+            return cached
+        try:
+            response = self._llm_client.post("/chat/completions", content=orjson.dumps(data), timeout=90)
+            return self._cache_store(key, self._parse_vision_response(response))
+        except httpx.TimeoutException:
             print(f"  ✗ Vision LLM call timeout")
             return None
         except Exception as e:
             print(f"  ✗ Vision LLM call failed: {str(e)}")
             return None
     
+    def _vision_request(self, content, max_tokens=1000, system_prompt=None):
+        """Build the chat completion payload for the vision model"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({
+            "role": "user",
+            "content": content
+        })
+        
+        return {
+            "model": VISION_MODEL,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": max_tokens
+        }
+    
+    def _parse_vision_response(self, response):
+        """Return the vision model's reply, None on API error"""
+        result = orjson.loads(response.content)
+        
+        # Print detailed error info
+        if 'error' in result:
+            print(f"  API error: {result['error']}")
+            return None
+        
+        if 'choices' not in result:
+            print(f"  API response abnormal: {result}")
+            return None
+            
+        return result['choices'][0]['message']['content']
+    
+    def _async_llm_client(self):
+        """SiliconFlow AsyncClient configured like self._llm_client
+        
+        AsyncClients are bound to the event loop they run on, so one is opened per
+        answer_question_async call instead of living on the instance.
+        """
+        return httpx.AsyncClient(
+            base_url=API_BASE,
+            headers=self.headers,
+            timeout=httpx.Timeout(90.0, connect=10.0),
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+                retries=LLM_CONNECT_RETRIES
+            )
+        )
+    
     def analyze_user_intent(self, user_query):
+        """Analyze user intent - cached by normalized query, with embedding-based near-duplicate hits"""
+        key = " ".join(user_query.lower().split())
+        cached = self._intent_cache_exact.get(key)
+        if cached is not None:
+            print(f"  ✓ Intent cache hit")
+            return dict(cached)
+        
+        # Near-duplicate matching is skipped for time-anchored queries, where a close
+        # neighbour ("... today" vs "... yesterday") may need a different answer path.
+        # Nothing is embedded (or the model loaded) until there is an earlier query to compare
+        # against, so one-question runs never pay for it.
+        similar = not _RE_TEMPORAL_ANCHOR.search(key) and self._intent_embedder is not False
+        embedding = None
+        if similar and self._intent_cache_similar:
+            embedding = self._embed_query(key)
+            if embedding is not None:
+                cached = self._lookup_similar_intent(embedding)
+                # Paraphrases embed close together even when they name different
+                # cities, so only reuse an intent that is about the same place
+                if cached is not None and _intent_cities(cached) == set(_match_cities(user_query)):
+                    print(f"  ✓ Intent cache hit (similar query)")
+                    return dict(cached)
+        
+        intent = self._analyze_user_intent_llm(user_query)
+        if intent:
+            self._intent_cache_exact[key] = intent
+            if similar:
+                # [query, embedding (None until the next lookup computes it), intent]
+                self._intent_cache_similar.append([key, embedding, intent])
+                del self._intent_cache_similar[:-INTENT_CACHE_MAX_SIMILAR]
+        return intent
+    
+    def _embed_query(self, text):
+        """Unit-norm embedding of a query, or None when sentence-transformers isn't installed"""
+        if self._intent_embedder is None:
+            # Optional dependency, imported (and the model loaded) on first use
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                self._intent_embedder = False
+            else:
+                self._intent_embedder = SentenceTransformer(INTENT_EMBED_MODEL)
+        if not self._intent_embedder:
+            return None
+        return self._intent_embedder.encode(text, normalize_embeddings=True, convert_to_numpy=True)
+    
+    def _lookup_similar_intent(self, embedding):
+        """Return the cached intent of the most similar previous query above the threshold"""
+        if not self._intent_cache_similar:
+            return None
+        for entry in self._intent_cache_similar:
+            if entry[1] is None:
+                entry[1] = self._embed_query(entry[0])
+        vectors = np.stack([vec for _, vec, _ in self._intent_cache_similar])
+        scores = vectors @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] >= INTENT_SIMILARITY_THRESHOLD:
+            return self._intent_cache_similar[best][2]
+        return None
+    
+    def _analyze_user_intent_llm(self, user_query):
         """Analyze user intent - completely delegate toLLMfor judgment and maximum generalization"""
         system_prompt = """You are an intelligent assistant that analyzes whether a user query can be answered using **real-time camera images**.
 
@@ -260,17 +1253,58 @@ Now analyze the user input above. Return ONLY JSON, no explanations."""
         
         # Extract JSON
         try:
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                intent = json.loads(json_match.group())
+            blob = _extract_json(response)
+            if blob:
+                intent = orjson.loads(blob)
                 return intent
-        except:
+        except orjson.JSONDecodeError:
             pass
         
         return None
     
     def search_earthcam(self, city, country=None):
         """Search for city camerfor on EarthCam"""
+        # Cities in the prebuilt index need no discovery at all
+        indexed = self._camera_index.get(_normalize_city(city))
+        if indexed:
+            return list(indexed)
+        return self._memo(self._camera_cache, self._search_cache_key(city, country), CAMERA_CACHE_TTL,
+                          lambda: self._search_earthcam_uncached(city, country),
+                          on_store=self._save_search_cache)
+    
+    def _search_cache_key(self, city, country=None):
+        return f"{_normalize_city(city)}|{(country or '').lower()}"
+    
+    def _load_search_cache(self):
+        """Fresh entries of the persisted search cache, {} if missing or unreadable"""
+        try:
+            entries = orjson.loads(SEARCH_CACHE_PATH.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+        now = time.time()
+        return {key: (expires_at, urls) for key, (expires_at, urls) in entries.items() if now < expires_at}
+    
+    def _save_search_cache(self):
+        """Write the search cache to disk (atomically replaced, so readers never see a partial file)"""
+        with self._camera_cache_lock:
+            now = time.time()
+            entries = {key: entry for key, entry in list(self._camera_cache.items()) if now < entry[0]}
+            try:
+                SEARCH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = SEARCH_CACHE_PATH.with_suffix(f'.{os.getpid()}.tmp')
+                tmp_path.write_bytes(orjson.dumps(entries))
+                os.replace(tmp_path, SEARCH_CACHE_PATH)
+            except OSError as e:
+                print(f"  ⚠ Failed to save search cache: {str(e)}")
+    
+    def _search_earthcam_uncached(self, city, country=None):
+        """Search for city camerfor on EarthCam (uncached)"""
+        
+        # First check if there are known popular city camerfor（including YouTube redirects）
+        known = _KNOWN_CAMERAS.get(_normalize_city(city))
+        if known:
+            print(f"  ✓ from known listFound {len(known)} camerfor")
+            return list(known)
         
         # If city name is in Chinese, translate to English first
         if any('\u4e00' <= char <= '\u9fff' for char in city):
@@ -290,86 +1324,10 @@ Now translate: {city}"""
                 english_city = english_city.strip().strip('"').strip("'")
                 print(f"  ✓ Translation: '{city}' → '{english_city}'")
                 city = english_city
-        
-        # First check if there are known popular city camerfor（including YouTube redirects）
-        known_camerfor = {
-            "london": [
-                "https://www.earthcam.com/world/england/london/abbeyroad/",
-                "https://www.earthcam.com/world/england/london/londoneye/",
-                "https://www.earthcam.com/world/england/london/trafalgarsquare/",
-            ],
-            "newyork": [
-                "https://www.earthcam.com/usa/newyork/timessquare/",
-                "https://www.earthcam.com/usa/newyork/statueofliberty/",
-            ],
-            "miami": [
-                "https://www.earthcam.com/usa/florida/miamibeach/",
-                "https://www.earthcam.com/usa/florida/miami/",
-            ],
-            "lforvegas": [
-                "https://www.earthcam.com/usa/nevada/lforvegas/",
-            ],
-            "chicago": [
-                "https://www.earthcam.com/usa/illinois/chicago/",
-            ],
-            "dublin": [
-                "https://www.earthcam.com/world/ireland/dublin/",
-            ],
-            "amsterdam": [
-                "https://www.earthcam.com/world/netherlands/amsterdam/",
-            ],
-            # Following cities contain YouTube live streams
-            "paris": [
-                "https://www.earthcam.com/world/france/paris/?cam=eiffeltower",
-                "https://www.earthcam.com/world/france/paris/",
-            ],
-            "tokyo": [
-                "https://www.earthcam.com/world/japan/tokyo/?cam=tokyoskytree",
-                "https://www.earthcam.com/world/japan/tokyo/",
-            ],
-            "sydney": [
-                "https://www.earthcam.com/world/australia/sydney/",
-            ],
-            "barcelona": [
-                "https://www.earthcam.com/world/spain/barcelona/",
-            ],
-            "rome": [
-                "https://www.earthcam.com/world/italy/rome/",
-            ],
-            "munich": [
-                "https://www.earthcam.com/world/germany/munich/",
-            ],
-            "dubai": [
-                "https://www.earthcam.com/world/unitedarabemirates/dubai/",
-            ],
-            "singapore": [
-                "https://www.earthcam.com/world/singapore/singapore/",
-            ],
-            "hongkong": [
-                "https://www.earthcam.com/world/china/hongkong/",
-            ],
-            "losangeles": [
-                "https://www.earthcam.com/usa/california/losangeles/",
-            ],
-            "sanfrancisco": [
-                "https://www.earthcam.com/usa/california/sanfrancisco/",
-            ],
-            "boston": [
-                "https://www.earthcam.com/usa/mforsachusetts/boston/",
-            ],
-            "wforhingtondc": [
-                "https://www.earthcam.com/usa/dc/",
-            ],
-            # South American cities (some use EarthCamTV iframe)
-            "riodejaneiro": [
-                "https://www.earthcam.com/world/brazil/riodejaneiro/",
-            ],
-        }
-        
-        city_lower = city.lower().replace(" ", "")
-        if city_lower in known_camerfor:
-            print(f"  ✓ from known listFound {len(known_camerfor[city_lower])} camerfor")
-            return known_camerfor[city_lower]
+                known = _KNOWN_CAMERAS.get(_normalize_city(city))
+                if known:
+                    print(f"  ✓ from known listFound {len(known)} camerfor")
+                    return list(known)
         
         # Otherwise try searching（Add timeout and error handling）
         print(f"  ⚠ {city} Not in known list, trying online search...")
@@ -378,213 +1336,305 @@ Now translate: {city}"""
             f"{city} {country}" if country else city,
             city,
         ]
+        # Drop duplicate terms (no country given) so we don't search twice
+        search_terms = list(dict.fromkeys(search_terms))
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
+        # Run all search terms concurrently, keep the first (most specific) term with results
         all_links = []
-        
-        for search_term in search_terms:
-            try:
-                search_url = f"https://www.earthcam.com/search/results.php?searchtext={search_term}"
-                print(f"  Trying to search: {search_term}")
-                
-                response = requests.get(search_url, headers=headers, timeout=10)
-                html = response.text
-                
-                # Extract camera links
-                camera_links = re.findall(r'href="(https://www\.earthcam\.com/[^"]+/)"', html)
-                
-                # Deduplicate and filter
-                for link in camera_links:
-                    if any(skip in link for skip in ['/search/', '/apps/', '/about/', '/content/']):
-                        continue
-                    if link not in all_links:
-                        all_links.append(link)
-                
-                if all_links:
-                    break
-                    
-            except Exception as e:
-                print(f"  ✗ Search failed: {str(e)}")
-                continue
+        for term_links in self._pool.map(self._search_earthcam_term, search_terms):
+            if term_links:
+                all_links = term_links
+                break
         
         if all_links:
             print(f"  ✓ Found {len(all_links)} camerfor")
         
         return all_links[:5]
     
-    def extract_hls_url_with_browser(self, page_url, timeout=15):
-        """Use browser to execute JavaScript and extract HLS stream URLs - Supports dynamically loaded videos"""
+    def _search_earthcam_term(self, search_term):
+        """Run a single EarthCam search and return the filtered camera links"""
+        links = []
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                )
-                page = context.new_page()
-                
-                # Intercept network requests, capture m3u8 files
-                captured_m3u8 = []
-                captured_youtube = []
-                
-                def handle_request(request):
-                    url = request.url
-                    if '.m3u8' in url:
-                        captured_m3u8.append(url)
-                        print(f"    ✓ Captured m3u8 stream: {url[:80]}...")
-                    elif 'youtube.com' in url or 'youtu.be' in url:
-                        match = re.search(r'(?:embed/|watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})', url)
-                        if match:
-                            captured_youtube.append(match.group(1))
-                
-                page.on('request', handle_request)
-                
-                # Visit page（Lower timeout, fail ffort）
-                print(f"    ⏳ Loading page with browser...")
-                try:
-                    page.goto(page_url, wait_until='domcontentloaded', timeout=timeout*1000)
-                    # Wait for network to stabilize
-                    page.wait_for_load_state('networkidle', timeout=5000)
-                except:
-                    # Continue even if timeout, may have already captured stream
-                    pass
-                
-                # Additional wait 2 seconds to ensure video starts loading
-                time.sleep(2)
-                
-                # Check page content
-                html = page.content()
-                
-                browser.close()
-                
-                # Prioritize returning captured m3u8 stream
-                if captured_m3u8:
-                    print(f"    ✓ Browser captured HLS stream")
-                    return captured_m3u8[0]
-                
-                # Check YouTube
-                if captured_youtube:
-                    print(f"    ✓ Browser captured YouTube: {captured_youtube[0]}")
-                    return f"YOUTUBE:{captured_youtube[0]}"
-                
-                # Extract from final HTML
-                m3u8_matches = re.findall(r'(https?://[^\s"\'<>]+\.m3u8[^\s"\'<>]*)', html)
-                if m3u8_matches:
-                    print(f"    ✓ Found HLS stream in HTML")
-                    return m3u8_matches[0]
-                
-                # Check YouTube iframe
-                youtube_matches = re.findall(r'(?:youtube\.com/embed/|youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})', html)
-                if youtube_matches:
-                    print(f"    ✓ Found YouTube in HTML: {youtube_matches[0]}")
-                    return f"YOUTUBE:{youtube_matches[0]}"
-                
-                print(f"    ✗ Browser did not find video stream")
+            search_url = f"https://www.earthcam.com/search/results.php?searchtext={search_term}"
+            print(f"  Trying to search: {search_term}")
+            
+            self._throttle()
+            response = self.session.get(search_url, timeout=HTTP_TIMEOUT)
+            html = response.text
+            
+            # Extract camera links
+            camera_links = _RE_CAMERA_LINK.findall(html)
+            
+            # Deduplicate and filter
+            for link in camera_links:
+                if any(skip in link for skip in ['/search/', '/apps/', '/about/', '/content/']):
+                    continue
+                if link not in links:
+                    links.append(link)
+                    
+        except Exception as e:
+            print(f"  ✗ Search failed: {str(e)}")
+        
+        return links
+    
+    def _ensure_browser(self):
+        """Lazily launch the shared Chromium instance (must run on the browser thread)"""
+        if self._browser is None or not self._browser.is_connected():
+            if self._pw is None:
+                from playwright.sync_api import sync_playwright
+                self._pw = sync_playwright().start()
+            self._browser = self._pw.chromium.launch(headless=True, args=BROWSER_ARGS)
+        return self._browser
+    
+    def _shutdown_browser(self):
+        """Close the shared browser and stop Playwright (must run on the browser thread)"""
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._pw is not None:
+            self._pw.stop()
+            self._pw = None
+    
+    def close(self):
+        """Release the shared browser, worker threads and pooled HTTP connections"""
+        self._browser_pool.submit(self._shutdown_browser).result()
+        self._browser_pool.shutdown(wait=True)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._llm_client.close()
+        self.session.close()
+        if self._llm_cache:
+            self._llm_cache.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def extract_hls_url_with_browser(self, page_url, timeout=15):
+        """Use browser to execute JavaScript and extract HLS stream URLs - Supports dynamically loaded videos"""
+        # Playwright's sync API is bound to the thread that started it, so all
+        # browser work goes through the dedicated browser thread
+        return self._browser_pool.submit(self._extract_hls_url_in_browser, page_url, timeout).result()
+    
+    def _extract_hls_url_in_browser(self, page_url, timeout, abort=None):
+        """Browser extraction body - runs on the browser thread with a fresh context per page
+        
+        abort: optional threading.Event; once set (e.g. the caller stopped waiting)
+        the load is skipped, or abandoned at the next poll. Loads queue behind each
+        other on the browser thread, so it is checked again right before navigating.
+        """
+        if abort is not None and abort.is_set():
+            return None
+        
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+        
+        context = None
+        try:
+            browser = self._ensure_browser()
+            if abort is not None and abort.is_set():
                 return None
-                
+            # A new context per page isolates cookies/storage while reusing the running browser
+            context = browser.new_context(
+                viewport={'width': 1920, 'height': 1080},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            )
+            context.route('**/*', _block_heavy_resources)
+            page = context.new_page()
+            
+            # Intercept network requests, capture m3u8 files
+            captured_m3u8 = []
+            captured_youtube = []
+            
+            def handle_request(request):
+                url = request.url
+                if '.m3u8' in url:
+                    captured_m3u8.append(url)
+                    print(f"    ✓ Captured m3u8 stream: {url[:80]}...")
+                elif 'youtube.com' in url or 'youtu.be' in url:
+                    match = _RE_YT_URL_ID.search(url)
+                    if match:
+                        captured_youtube.append(match.group(1))
+            
+            page.on('request', handle_request)
+            
+            # Visit page（Lower timeout, fail ffort）
+            print(f"    ⏳ Loading page with browser...")
+            try:
+                # Only wait for the response to commit; the stream request is what we're after
+                if abort is not None and abort.is_set():
+                    return None
+                self._throttle()
+                page.goto(page_url, wait_until='commit', timeout=timeout*1000)
+                # Return as soon as the player requests a stream instead of waiting for networkidle;
+                # polling keeps request events flowing and lets an abort take effect quickly
+                deadline = time.monotonic() + timeout
+                while not captured_m3u8 and not captured_youtube and time.monotonic() < deadline:
+                    if abort is not None and abort.is_set():
+                        return None
+                    page.wait_for_timeout(BROWSER_POLL_MS)
+            except PlaywrightTimeoutError:
+                # Continue even if timeout, may have already captured stream
+                pass
+            
+            # Check page content
+            html = page.content()
+            
+            # Prioritize returning captured m3u8 stream
+            if captured_m3u8:
+                print(f"    ✓ Browser captured HLS stream")
+                return captured_m3u8[0]
+            
+            # Check YouTube
+            if captured_youtube:
+                print(f"    ✓ Browser captured YouTube: {captured_youtube[0]}")
+                return f"YOUTUBE:{captured_youtube[0]}"
+            
+            # Extract from final HTML
+            m3u8_matches = _RE_M3U8.findall(html)
+            if m3u8_matches:
+                print(f"    ✓ Found HLS stream in HTML")
+                return m3u8_matches[0]
+            
+            # Check YouTube iframe
+            youtube_matches = _RE_YT.findall(html)
+            if youtube_matches:
+                print(f"    ✓ Found YouTube in HTML: {youtube_matches[0]}")
+                return f"YOUTUBE:{youtube_matches[0]}"
+            
+            print(f"    ✗ Browser did not find video stream")
+            return None
+            
         except Exception as e:
             print(f"    ✗ Browser extraction failed: {str(e)[:50]}")
             return None
+        finally:
+            if context is not None:
+                try:
+                    context.close()
+                except Exception:
+                    pass
+    
+    def extract_hls_url(self, page_url, abort=None):
+        """Extract HLS stream URL from camera page - Enhanced version: Support YouTube and other external platformsrmsredirects + JavaScriptdynamically loaded
+        
+        abort: optional threading.Event the caller sets once it no longer needs the
+        result (capture_from_candidates after a hit); a pending browser load is then skipped.
+        """
+        # Static extraction first (on this thread); only pages it can't resolve are
+        # queued on the single browser thread, so they don't wait behind loads nobody needs
+        static_result, needs_browser = self._static_extract(page_url)
+        if static_result and not needs_browser:
+            return static_result
+        
+        if needs_browser:
+            print(f"    ⏳ Switch to browser mode...")
+        else:
+            print(f"    ⏳ Static method failed, trying browser mode...")
+        
+        if abort is None:
+            abort = threading.Event()
+        elif abort.is_set():
+            return static_result
+        browser_future = self._browser_pool.submit(self._extract_hls_url_in_browser, page_url, 15, abort)
+        try:
+            browser_result = browser_future.result(timeout=BROWSER_RACE_TIMEOUT)
+        except FutureTimeoutError:
+            print(f"    ✗ Browser did not finish within {BROWSER_RACE_TIMEOUT}s")
+            abort.set()
+            browser_future.cancel()
+            browser_result = None
+        
+        # Browser result wins for EarthCamTV pages, static findings remain the fallback
+        return browser_result or static_result
     
-    def extract_hls_url(self, page_url):
-        """Extract HLS stream URL from camera page - Enhanced version: Support YouTube and other external platformsrmsredirects + JavaScriptdynamically loaded"""
+    def _static_extract(self, page_url):
+        """Static HTML extraction, returns (stream, needs_browser)
+        
+        needs_browser is True when the page embeds an EarthCamTV iframe, whose real
+        stream only shows up after JavaScript runs; stream is then just a fallback.
+        """
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Connection': 'keep-alive',
         }
         
-        # Step 1: Try static method first (ffort)
+        hfor_earthcamtv_iframe = False
         try:
-            response = requests.get(page_url, headers=headers, timeout=15, allow_redirects=True)
+            self._throttle()
+            response = self.session.get(page_url, headers=headers, timeout=HTTP_TIMEOUT, allow_redirects=True)
             html = response.text
             final_url = response.url
                 
                 # Detect if redirected to external platform
             if 'youtube.com' in final_url or 'youtu.be' in final_url:
                 print(f"    ⚠ Detected YouTube redirect: {final_url}")
-                return self.extract_youtube_stream(final_url)
+                return self.extract_youtube_stream(final_url), False
             
             # Prioritize detecting EarthCamTV and other external camera iframes（These are real camerfor）
-            hfor_earthcamtv_iframe = False
-            iframe_matches = re.findall(r'<iframe[^>]+src=["\']([^"\']+)["\']', html, re.IGNORECASE)
+            iframe_matches = _RE_IFRAME.findall(html)
             for iframe_src in iframe_matches:
                 if 'earthcamtv.com' in iframe_src:
                     hfor_earthcamtv_iframe = True
                     print(f"    ⚠ Detected EarthCamTV iframe，Requires JavaScript execution")
                     break
             
-            # if found EarthCamTV iframe but static method cannot get stream, use browser
-            if hfor_earthcamtv_iframe:
-                print(f"    ⏳ Switch to browser mode...")
-                browser_result = self.extract_hls_url_with_browser(page_url)
-                if browser_result:
-                    return browser_result
-            
             # Then detect YouTube（May be embedded video, lower priority than real camerfor）
             if 'youtube.com' in html or 'youtu.be' in html:
                 # Page-embedded YouTube
-                youtube_matches = re.findall(r'(?:youtube\.com/embed/|youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})', html)
+                youtube_matches = _RE_YT.findall(html)
                 if youtube_matches:
                     video_id = youtube_matches[0]
                     print(f"    ⚠ Detected embedded YouTube video: {video_id}")
-                    return f"YOUTUBE:{video_id}"
+                    return f"YOUTUBE:{video_id}", hfor_earthcamtv_iframe
             
             # Detect other iframes
             for iframe_src in iframe_matches:
                 if 'youtube.com' in iframe_src or 'youtu.be' in iframe_src:
-                    youtube_id = re.search(r'(?:embed/|watch\?v=)([a-zA-Z0-9_-]{11})', iframe_src)
+                    youtube_id = _RE_YT_URL_ID.search(iframe_src)
                     if youtube_id:
                         print(f"    ⚠ Detected YouTube in iframe: {youtube_id.group(1)}")
-                        return f"YOUTUBE:{youtube_id.group(1)}"
+                        return f"YOUTUBE:{youtube_id.group(1)}", hfor_earthcamtv_iframe
             
             # Method 1: Standard html5_streaming configuration
-            domain_match = re.search(r'html5_streamingdomain":"([^"]+)"', html)
-            path_match = re.search(r'html5_streampath":"([^"]+)"', html)
+            domain_match = _RE_HTML5_DOMAIN.search(html)
+            path_match = _RE_HTML5_PATH.search(html)
             
             if domain_match and path_match:
                 domain = domain_match.group(1).replace(r'\/', '/')
                 path = path_match.group(1).replace(r'\/', '/')
                 hls_url = domain + path
                 print(f"    ✓ Found HLS stream (Standard configuration)")
-                return hls_url
+                return hls_url, hfor_earthcamtv_iframe
             
             # Method 2: Search for m3u8 links directly
-            m3u8_matches = re.findall(r'(https?://[^\s"\'<>]+\.m3u8[^\s"\'<>]*)', html)
+            m3u8_matches = _RE_M3U8.findall(html)
             if m3u8_matches:
                 hls_url = m3u8_matches[0]
                 print(f"    ✓ Found HLS stream (Direct link)")
-                return hls_url
+                return hls_url, hfor_earthcamtv_iframe
             
             # Method 3: Find player configuration
-            player_match = re.search(r'"file"\s*:\s*"([^"]+\.m3u8[^"]*)"', html)
+            player_match = _RE_PLAYER_FILE.search(html)
             if player_match:
                 hls_url = player_match.group(1).replace(r'\/', '/')
                 print(f"    ✓ Found HLS stream (Player configuration)")
-                return hls_url
+                return hls_url, hfor_earthcamtv_iframe
             
         except Exception as e:
             print(f"    ✗ Static extraction failed: {str(e)[:50]}")
         
-        # If static method fails, try browser（As fallback）
-        print(f"    ⏳ Static method failed, trying browser mode...")
-        return self.extract_hls_url_with_browser(page_url)
+        return None, hfor_earthcamtv_iframe
     
     def extract_youtube_stream(self, youtube_url):
         """Handle YouTube links - Return special marker for subsequent processing"""
         try:
             # Extract video ID
-            video_id = None
-            if 'watch?v=' in youtube_url:
-                video_id = re.search(r'watch\?v=([a-zA-Z0-9_-]{11})', youtube_url)
-            elif 'youtu.be/' in youtube_url:
-                video_id = re.search(r'youtu\.be/([a-zA-Z0-9_-]{11})', youtube_url)
-            elif 'embed/' in youtube_url:
-                video_id = re.search(r'embed/([a-zA-Z0-9_-]{11})', youtube_url)
+            video_id = _RE_YT_URL_ID.search(youtube_url)
             
             if video_id:
                 print(f"    ✓ Extract YouTube video ID: {video_id.group(1)}")
@@ -594,10 +1644,18 @@ Now translate: {city}"""
         
         return None
     
+    def _load_playlist(self, playlist_url, headers):
+        """Fetch and parse an m3u8 playlist over the shared session"""
+        import m3u8
+        
+        response = self.session.get(playlist_url, headers=headers, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        # Resolve relative URIs against the final URL (after redirects)
+        return m3u8.loads(response.text, uri=response.url)
+    
     def get_latest_ts_segment(self, playlist_url):
         """Get latest TS video segment - Enhanced version: Multiple fallbacks"""
         headers = {
-            'User-Agent': 'Mozilla/5.0',
             'Referer': 'https://www.earthcam.com/'
         }
         
@@ -606,14 +1664,14 @@ Now translate: {city}"""
                 if attempt > 0:
                     time.sleep(3)
                 
-                playlist = m3u8.load(playlist_url, headers=headers, timeout=15)
+                playlist = self._load_playlist(playlist_url, headers)
                 
                 # If mforter playlist, get sub-playlist
                 if playlist.is_variant:
                     # Select highest quality stream
                     best_playlist = max(playlist.playlists, key=lambda p: p.stream_info.bandwidth if p.stream_info else 0)
                     variant_url = urljoin(playlist_url, best_playlist.uri)
-                    playlist = m3u8.load(variant_url, headers=headers, timeout=15)
+                    playlist = self._load_playlist(variant_url, headers)
                 
                 if playlist.segments and len(playlist.segments) > 0:
                     # Get lfort segment (most recent)
@@ -633,37 +1691,193 @@ Now translate: {city}"""
     def extract_frame_from_ts(self, ts_url):
         """Extract frame from TS segment"""
         headers = {
-            'User-Agent': 'Mozilla/5.0',
             'Referer': 'https://www.earthcam.com/'
         }
         
         try:
-            response = requests.get(ts_url, headers=headers, timeout=20)
+            # HLS segments start with a keyframe, so the leading bytes are usually enough
+            range_headers = dict(headers, Range=f'bytes=0-{TS_PREFIX_BYTES - 1}')
+            response = self.session.get(ts_url, headers=range_headers, timeout=HTTP_TIMEOUT)
+            
+            if response.status_code == 206:
+                frame = self._decode_first_frame(response.content)
+                if frame is not None:
+                    return frame
+                # Prefix didn't decode, fall back to the full segment
+                response = self.session.get(ts_url, headers=headers, timeout=HTTP_SEGMENT_TIMEOUT)
             
+            # 200: full segment (either the fallback or a server that ignores Range)
             if response.status_code == 200:
-                temp_ts = f"/tmp/temp_segment_{int(time.time())}.ts"
-                with open(temp_ts, 'wb') as f:
-                    f.write(response.content)
-                
-                cap = cv2.VideoCapture(temp_ts)
-                
-                if cap.isOpened():
-                    ret, frame = cap.read()
-                    cap.release()
-                    os.remove(temp_ts)
-                    
-                    if ret:
-                        return frame
-        except:
+                frame = self._decode_first_frame(response.content)
+                if frame is None:
+                    frame = self._decode_first_frame_via_file(response.content)
+                return frame
+        except (requests.RequestException, OSError):
+            pass
+        
+        return None
+    
+    def _decode_first_frame(self, ts_bytes):
+        """Decode the first keyframe of an MPEG-TS segment in memory with PyAV"""
+        import av
+        
+        try:
+            with av.open(io.BytesIO(ts_bytes)) as container:
+                stream = container.streams.video[0]
+                # Only keyframes are decoded; HLS segments start with one
+                stream.codec_context.skip_frame = 'NONKEY'
+                for frame in container.decode(stream):
+                    return frame.to_ndarray(format='bgr24')
+        except (av.error.FFmpegError, IndexError, ValueError):
             pass
+        return None
+    
+    def _decode_first_frame_via_file(self, ts_bytes):
+        """Fallback decode through a temporary file and OpenCV"""
+        import cv2
+        
+        with tempfile.NamedTemporaryFile(suffix='.ts', delete=False) as f:
+            f.write(ts_bytes)
+            temp_ts = f.name
+        
+        try:
+            cap = cv2.VideoCapture(temp_ts)
+            if cap.isOpened():
+                ret, frame = cap.read()
+                cap.release()
+                if ret:
+                    return frame
+        finally:
+            os.remove(temp_ts)
         
         return None
     
+    def _encode_frame(self, frame):
+        """Downscale a frame to VISION_MAX_SIDE and JPEG-encode it, returns JPEG bytes or None"""
+        import cv2
+        
+        frame = _fast_resize(frame)
+        ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, VISION_JPEG_QUALITY,
+                                               cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+        return buf.tobytes() if ok else None
+    
+    def _shrink_jpeg(self, jpeg_bytes):
+        """Re-encode a downloaded JPEG through _encode_frame if it exceeds VISION_MAX_SIDE"""
+        import cv2
+        
+        frame = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None or max(frame.shape[:2]) <= VISION_MAX_SIDE:
+            return jpeg_bytes
+        return self._encode_frame(frame) or jpeg_bytes
+    
+    def _remember_encoded(self, image_path, jpeg_bytes):
+        """Keep a capture's data URI in memory so the vision call doesn't re-read it from disk"""
+        self._encoded_images[image_path] = "data:image/jpeg;base64," + base64.b64encode(jpeg_bytes).decode('ascii')
+        while len(self._encoded_images) > ENCODED_IMAGE_CACHE_SIZE:
+            self._encoded_images.popitem(last=False)
+    
+    def capture_from_candidates(self, camera_urls):
+        """Resolve streams for all candidate cameras concurrently and capture from the first that works
+        
+        Returns (image_path, camera_url), or (None, None) if no candidate produced an image.
+        """
+        # A camera captured moments ago is still current enough
+        for camera_url in camera_urls:
+            image_path = self._cached_capture(camera_url)
+            if image_path:
+                return image_path, camera_url
+        
+        print(f"\n  [1/3] Analyzing {len(camera_urls)} camera pages concurrently...")
+        abort = threading.Event()
+        futures = {self._pool.submit(self.extract_hls_url, url, abort): url for url in camera_urls}
+        
+        try:
+            for future in as_completed(futures, timeout=CANDIDATE_TIMEOUT):
+                camera_url = futures[future]
+                try:
+                    hls_url = future.result()
+                except Exception as e:
+                    print(f"  ✗ {camera_url}: {str(e)[:50]}")
+                    continue
+                
+                if not hls_url:
+                    print(f"  ✗ No video stream found: {camera_url}")
+                    continue
+                
+                print(f"  ✓ Stream resolved: {camera_url}")
+                image_path = self._capture_from_stream(hls_url)
+                if image_path:
+                    self._store_capture(camera_url, image_path)
+                    return image_path, camera_url
+        except FutureTimeoutError:
+            print(f"  ✗ Camera pages did not respond within {CANDIDATE_TIMEOUT}s")
+        finally:
+            # Drop candidates that haven't started yet, and browser loads the rest still queue
+            abort.set()
+            for future in futures:
+                future.cancel()
+        
+        return None, None
+    
     def capture_camera_image(self, camera_url):
         """Capture image from camera URL - Support YouTube and other external platforms"""
+        image_path = self._cached_capture(camera_url)
+        if image_path:
+            return image_path
+        
         print(f"\n  [1/3] Analyzing camera page...")
         hls_url = self.extract_hls_url(camera_url)
         
+        if not hls_url:
+            print(f"  ✗ No video stream found")
+            return None
+        
+        image_path = self._capture_from_stream(hls_url)
+        if image_path:
+            self._store_capture(camera_url, image_path)
+        return image_path
+    
+    def _capture_key(self, camera_url):
+        return hashlib.sha256(camera_url.encode('utf-8')).hexdigest()
+    
+    def _read_capture_index(self):
+        try:
+            return orjson.loads(self._capture_index_path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+    
+    def _cached_capture(self, camera_url):
+        """Path of this camera's capture if it was taken within CAPTURE_CACHE_TTL, else None
+        
+        The index only points at files in the capture directory (which are kept
+        anyway), so a hit costs no copy and the returned path stays valid.
+        """
+        entry = self._read_capture_index().get(self._capture_key(camera_url))
+        if not entry:
+            return None
+        age = time.time() - entry['captured_at']
+        if age < CAPTURE_CACHE_TTL and os.path.exists(entry['path']):
+            print(f"  ✓ Reusing capture from {age:.0f}s ago: {entry['path']}")
+            return entry['path']
+        return None
+    
+    def _store_capture(self, camera_url, image_path):
+        """Record a fresh capture in the index (expired entries are dropped on write)"""
+        with self._capture_index_lock:
+            now = time.time()
+            index = {key: entry for key, entry in self._read_capture_index().items()
+                     if now - entry['captured_at'] < CAPTURE_CACHE_TTL}
+            index[self._capture_key(camera_url)] = {'path': image_path, 'captured_at': now}
+            try:
+                # Write-then-rename so concurrent readers never see a partial index
+                tmp_path = self._capture_index_path.with_suffix(f'.{os.getpid()}.tmp')
+                tmp_path.write_bytes(orjson.dumps(index))
+                os.replace(tmp_path, self._capture_index_path)
+            except OSError as e:
+                print(f"  ⚠ Failed to update capture index: {str(e)}")
+    
+    def _capture_from_stream(self, hls_url):
+        """Capture image from a resolved stream (HLS URL or YOUTUBE: marker)"""
         if not hls_url:
             print(f"  ✗ No video stream found")
             return None
@@ -688,12 +1902,13 @@ Now translate: {city}"""
         print(f"  [3/3] Download and extract frame...")
         frame = self.extract_frame_from_ts(ts_url)
         
-        if frame is not None:
+        jpeg_bytes = self._encode_frame(frame) if frame is not None else None
+        if jpeg_bytes:
             # Save image
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            os.makedirs("captured_images", exist_ok=True)
-            filename = f"captured_images/qa_capture_{timestamp}.jpg"
-            cv2.imwrite(filename, frame)
+            filename = str(self._capture_dir / f"qa_capture_{int(time.time() * 1000)}.jpg")
+            with open(filename, 'wb') as f:
+                f.write(jpeg_bytes)
+            self._remember_encoded(filename, jpeg_bytes)
             
             print(f"  ✓ Saved image: {filename}")
             return filename
@@ -712,26 +1927,43 @@ Now translate: {city}"""
                 f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg",      # Medium quality
             ]
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            # Fetch all qualities at once; keep the best one whose higher-priority
+            # alternatives have already failed (no need to wait for lower ones)
+            futures = {
+                self._pool.submit(self._fetch_thumbnail, url): i
+                for i, url in enumerate(thumbnail_urls)
             }
+            results = [None] * len(thumbnail_urls)
+            finished = [False] * len(thumbnail_urls)
+            content = None
+            try:
+                for future in as_completed(futures):
+                    index = futures[future]
+                    results[index] = future.result()
+                    finished[index] = True
+                    for ready, result in zip(finished, results):
+                        if not ready:
+                            break
+                        if result:
+                            content = result
+                            break
+                    if content:
+                        break
+            finally:
+                for future in futures:
+                    future.cancel()
             
-            for url in thumbnail_urls:
-                try:
-                    response = requests.get(url, headers=headers, timeout=10)
-                    if response.status_code == 200 and len(response.content) > 1000:  # Ensure not placeholder image
-                        # Save image
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        os.makedirs("captured_images", exist_ok=True)
-                        filename = f"captured_images/qa_capture_youtube_{timestamp}.jpg"
-                        
-                        with open(filename, 'wb') as f:
-                            f.write(response.content)
-                        
-                        print(f"  ✓ YouTube image saved: {filename}")
-                        return filename
-                except:
-                    continue
+            if content:
+                content = self._shrink_jpeg(content)
+                # Save image
+                filename = str(self._capture_dir / f"qa_capture_youtube_{int(time.time() * 1000)}.jpg")
+                
+                with open(filename, 'wb') as f:
+                    f.write(content)
+                self._remember_encoded(filename, content)
+                
+                print(f"  ✓ YouTube image saved: {filename}")
+                return filename
             
             print(f"  ✗ Unable to get YouTube thumbnail")
             
@@ -740,8 +1972,135 @@ Now translate: {city}"""
         
         return None
     
+    def _fetch_thumbnail(self, url):
+        """Download one thumbnail, returns its bytes or None (missing/placeholder/error)"""
+        try:
+            response = self.session.get(url, timeout=HTTP_TIMEOUT)
+            if response.status_code == 200 and len(response.content) > 1000:  # Ensure not placeholder image
+                return response.content
+        except requests.RequestException:
+            pass
+        return None
+    
+    def search_with_landmark_fallback(self, city):
+        """search_earthcam(city), falling back to LLM-suggested landmarks in the city"""
+        camera_urls = self.search_earthcam(city)
+        
+        if not camera_urls:
+            _safe_print(f"  ⚠ {city}: No available camera found, trying to search...")
+            # Let LLM suggest search keywords
+            search_prompt = f"Suggest 2-3 specific landmark names in {city} that might have EarthCam camerfor. Return only JSON: {{\"landmarks\": [\"landmark1\", \"landmark2\"]}}"
+            search_response = self.call_llm_text(search_prompt, temperature=0.3, json_schema=LANDMARKS_SCHEMA)
+            
+            if search_response:
+                try:
+                    landmarks = _parse_json_reply(search_response).get('landmarks', [])
+                except orjson.JSONDecodeError:
+                    landmarks = []
+                for landmark in landmarks[:2]:
+                    _safe_print(f"  Trying to search landmark: {landmark}")
+                    camera_urls = self.search_earthcam(landmark, city)
+                    if camera_urls:
+                        break
+        
+        return camera_urls
+    
+    def _process_city(self, city):
+        """Search cameras for one city (with landmark fallback) and capture an image
+        
+        Returns (city, image_path or None, camera_urls tried).
+        """
+        _safe_print(f"\n  --- Processing city: {city} ---")
+        
+        # Search for camerfor
+        camera_urls = self.search_with_landmark_fallback(city)
+        
+        # Try to capture image
+        image_path = None
+        if camera_urls:
+            image_path, _ = self.capture_from_candidates(camera_urls[:3])
+        
+        if image_path:
+            _safe_print(f"  ✓ {city}: Image capture successful")
+        else:
+            _safe_print(f"  ✗ {city}: No available camerfor")
+        
+        return city, image_path, list(camera_urls[:3]) if camera_urls else []
+    
+    async def _analyze_city_image(self, client, city, image_path, query_language, local_time_task, detail=None):
+        """Run the vision analysis for one city's captured image"""
+        # Get local time (requested in the background before capture)
+        local_time_str, timezone_str = await local_time_task
+        
+        # Let LLM analyze image (instructions are static, only the caption varies)
+        if query_language == 'zh':
+            system_prompt = CITY_VISION_SYSTEM_PROMPT_ZH
+            vision_prompt = f"This{city}real-time camera image from（captured at：{local_time_str} {timezone_str}）。"
+        else:
+            system_prompt = CITY_VISION_SYSTEM_PROMPT_EN
+            vision_prompt = f"Real-time camera image from {city} (captured at {local_time_str} {timezone_str})."
+        
+        analysis = await self.call_llm_vision_async(client, image_path, vision_prompt, detail=detail,
+                                                    system_prompt=system_prompt)
+        return {
+            'status': 'success',
+            'analysis': analysis,
+            'image_path': image_path,
+            'local_time': local_time_str,
+            'timezone': timezone_str
+        }
+    
+    async def _answer_comparison(self, client, user_query, plan, city_images, local_time_tasks):
+        """Answer a comparison with one multi-image vision call (Steps 3 and 4 fused), None on failure"""
+        print(f"\n[Step 3] Comparing camera images in a single vision call...")
+        
+        images = []
+        for city, image_path in city_images.items():
+            if image_path:
+                local_time_str, timezone_str = await local_time_tasks[city]
+                images.append((image_path, f"{city} (local time {local_time_str} {timezone_str}):"))
+        missing = [city for city, image_path in city_images.items() if not image_path]
+        
+        prompt = f"Original user query: {user_query}"
+        if missing:
+            prompt += f"\nNo camera is currently available for: {', '.join(missing)}."
+        system_prompt = COMPARE_SYSTEM_PROMPT_ZH if plan.get('query_language') == 'zh' else COMPARE_SYSTEM_PROMPT_EN
+        
+        answer = await self.call_llm_vision_compare_async(client, images, prompt, system_prompt=system_prompt)
+        if not answer:
+            return None
+        
+        print("\n" + "="*70)
+        print("Answer:")
+        print("="*70)
+        print(answer)
+        
+        print("\n" + "="*70)
+        print(f"Reference images: {', '.join(path for path, _ in images)}")
+        print("="*70)
+        
+        return answer
+    
     def answer_question(self, user_query):
-        """Main function: Answer user question - Let LLM drive the entire process"""
+        """Main function: Answer user question - Let LLM drive the entire process
+        
+        Blocking. Code already running an event loop should await
+        answer_question_async instead; if it calls this anyway (e.g. from a
+        notebook), the query runs on its own loop in a helper thread.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.answer_question_async(user_query))
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(asyncio.run, self.answer_question_async(user_query)).result()
+    
+    async def answer_question_async(self, user_query):
+        """Async version of answer_question: LLM round-trips for all cities overlap on one event loop"""
+        async with self._async_llm_client() as client:
+            return await self._answer_question(client, user_query)
+    
+    async def _answer_question(self, client, user_query):
         print("="*70)
         print("Environment QA System")
         print("="*70)
@@ -751,63 +2110,37 @@ Now translate: {city}"""
         # Step 1: Let LLM analyze requirements and create plan
         print("\n[Step 1] Analyzing user needs and creating execution plan...")
         
-        plan_prompt = f"""User query: {user_query}
-
-This is an EarthCam-based environmental monitoring system. Our PRIMARY PURPOSE is to answer questions using real-time camera images from cities worldwide.
-
-CORE PRINCIPLE: If the query mentions ANY city/location or forks about ANY observable condition (weather, traffic, people, environment, etc.), we SHOULD use camerfor.
-
-Only set needs_camera=false if:
-- Asking definitions/explanations (e.g., "What is PM2.5?", "How does photosynthesis work?")
-- Completely unrelated topics (e.g., "Who is Sun Wukong's mother?", "Recipe for pizza")
-- Historical facts without visual evidence needed
-
-For MOST queries about cities, current conditions, comparisons, environment → needs_camera=true
-
-Determine:
-1. Does this query need real-time camera images? (DEFAULT: YES for city/location/environment queries)
-2. Which cities are involved? (normalize: LA→Los Angeles, NYC→New York, Tokyo→Tokyo, Londn→London, etc.)
-3. Is this comparing multiple cities?
-4. What language to respond in?
-
-Return ONLY JSON:
-{{
-    "needs_camera": true/false,
-    "cities": ["City1", "City2", ...],
-    "is_comparison": true/false,
-    "query_language": "en/zh/other",
-    "query_type": "environmental/weather/traffic/people/general",
-    "execution_strategy": "Brief description"
-}}"""
-        
-        plan_response = self.call_llm_text(plan_prompt, temperature=0.3)
-        
-        if not plan_response:
-            return "Sorry, I cannot understand your question." if '?' in user_query or '' in user_query else "Sorry, I cannot understand your question."
-        
-        try:
-            json_match = re.search(r'\{.*\}', plan_response, re.DOTALL)
-            if not json_match:
-                return "Sorry, I cannot process your request。"
+        # Simple "<known city> + <observable condition>" queries are planned locally
+        plan = _route_plan(user_query)
+        if plan:
+            print("  ✓ Planned locally (no LLM call needed)")
+        else:
+            plan_prompt = f"User query: {user_query}"
+            plan_response = await self.call_llm_text_async(client, plan_prompt, PLAN_SYSTEM_PROMPT, temperature=0.3,
+                                                           json_schema=PLAN_SCHEMA)
             
-            plan = json.loads(json_match.group())
-            print(f"  Execution plan:")
-            print(f"    Needs camera: {plan.get('needs_camera')}")
-            print(f"    Cities involved: {plan.get('cities')}")
-            print(f"    Is comparison: {plan.get('is_comparison')}")
-            print(f"    Query language: {plan.get('query_language')}")
-            print(f"    Execution strategy: {plan.get('execution_strategy')}")
+            if not plan_response:
+                return "Sorry, I cannot understand your question." if '?' in user_query or '' in user_query else "Sorry, I cannot understand your question."
             
-        except Exception as e:
-            print(f"  ✗ Plan parsing failed: {str(e)}")
-            return "Sorry, I cannot process your request。"
+            try:
+                plan = _parse_json_reply(plan_response)
+            except Exception as e:
+                print(f"  ✗ Plan parsing failed: {str(e)}")
+                return "Sorry, I cannot process your request。"
+        
+        print(f"  Execution plan:")
+        print(f"    Needs camera: {plan.get('needs_camera')}")
+        print(f"    Cities involved: {plan.get('cities')}")
+        print(f"    Is comparison: {plan.get('is_comparison')}")
+        print(f"    Query language: {plan.get('query_language')}")
+        print(f"    Execution strategy: {plan.get('execution_strategy')}")
         
         # If camera not needed, let LLM answer directly
         if not plan.get('needs_camera'):
             print("\n[Note] This question does not require real-time camera images")
             
             lang_prompt = "You are a friendly assistant。" if plan.get('query_language') == 'zh' else "You are a friendly assistant."
-            response = self.call_llm_text(user_query, lang_prompt)
+            response = await self.call_llm_text_async(client, user_query, lang_prompt)
             
             print("\n" + "="*70)
             print("Answer:")
@@ -822,88 +2155,51 @@ Return ONLY JSON:
         
         print(f"\n[Step 2] for {len(cities)} cities capturing images...")
         
-        city_images = {}
-        city_analyses = {}
+        # Local time lookups don't depend on the captured images, start them now
+        local_time_tasks = {
+            city: asyncio.ensure_future(asyncio.to_thread(self.get_local_time_from_llm, city))
+            for city in cities
+        }
+        try:
+            return await self._answer_from_cameras(client, user_query, plan, cities, local_time_tasks)
+        finally:
+            # Cities whose capture failed never await their lookup; don't leave them pending
+            for task in local_time_tasks.values():
+                task.cancel()
+            await asyncio.gather(*local_time_tasks.values(), return_exceptions=True)
+    
+    async def _answer_from_cameras(self, client, user_query, plan, cities, local_time_tasks):
+        """Steps 2-4 once local time lookups are running: capture, analyze, synthesize"""
+        # Cities are independent, search + capture them in parallel (gather keeps plan order).
+        # Capture is blocking requests/Playwright work, so it runs on worker threads.
+        city_results = await asyncio.gather(*(asyncio.to_thread(self._process_city, city) for city in cities))
+        city_images = {city: image_path for city, image_path, _ in city_results}
         
-        for city in cities:
-            print(f"\n  --- Processing city: {city} ---")
-            
-            # Search for camerfor
-            camera_urls = self.search_earthcam(city)
-            
-            if not camera_urls:
-                print(f"  ⚠ {city}: No available camera found, trying to search...")
-                # Let LLM suggest search keywords
-                search_prompt = f"Suggest 2-3 specific landmark names in {city} that might have EarthCam camerfor. Return only JSON: {{\"landmarks\": [\"landmark1\", \"landmark2\"]}}"
-                search_response = self.call_llm_text(search_prompt, temperature=0.3)
-                
-                try:
-                    landmarks_match = re.search(r'\{.*\}', search_response, re.DOTALL)
-                    if landmarks_match:
-                        landmarks_data = json.loads(landmarks_match.group())
-                        for landmark in landmarks_data.get('landmarks', [])[:2]:
-                            print(f"  Trying to search landmark: {landmark}")
-                            camera_urls = self.search_earthcam(landmark, city)
-                            if camera_urls:
-                                break
-                except:
-                    pass
-            
-            # Try to capture image
-            image_path = None
-            if camera_urls:
-                for i, camera_url in enumerate(camera_urls[:3], 1):
-                    print(f"  Trying camera {i}/{min(3, len(camera_urls))}: {camera_url}")
-                    image_path = self.capture_camera_image(camera_url)
-                    if image_path:
-                        break
-            
-            if image_path:
-                city_images[city] = image_path
-                print(f"  ✓ {city}: Image capture successful")
-            else:
-                print(f"  ✗ {city}: No available camerfor")
-                city_images[city] = None
+        # Comparisons: let the vision model see all images at once instead of
+        # describing each one and synthesizing from the descriptions
+        if plan.get('is_comparison') and sum(1 for path in city_images.values() if path) >= 2:
+            answer = await self._answer_comparison(client, user_query, plan, city_images, local_time_tasks)
+            if answer:
+                return answer
+            print("  ⚠ Combined comparison failed, analyzing cities separately...")
         
         # Step 3: Analyze images or handle missing cases
         print(f"\n[Step 3] Analyzing images and generating answer...")
         
-        # Let LLM decide how to handle
-        for city, image_path in city_images.items():
-            if image_path:
-                # Get local time
-                local_time_str, timezone_str = self.get_local_time_from_llm(city)
-                
-                # Let LLM analyze image
-                query_language = plan.get('query_language', 'en')
-                
-                if query_language == 'zh':
-                    vision_prompt = f"""Please analyze this{city}real-time camera image from（captured at：{local_time_str} {timezone_str}）。
-
-Brief description：
-1. Weather conditions（clear/cloudy/rainy）
-2. Visibility and air quality
-3. Traffic and crowd conditions
-
-Answer concisely in Chinese（3-5sentences）。"""
-                else:
-                    vision_prompt = f"""Analyze this real-time camera image from {city} (captured at {local_time_str} {timezone_str}).
-
-Briefly describe:
-1. Weather conditions (clear/cloudy/rainy)
-2. Visibility and air quality
-3. Traffic and crowd conditions
-
-Answer concisely in English (3-5 sentences)."""
-                
-                analysis = self.call_llm_vision(image_path, vision_prompt)
-                city_analyses[city] = {
-                    'status': 'success',
-                    'analysis': analysis,
-                    'image_path': image_path,
-                    'local_time': local_time_str,
-                    'timezone': timezone_str
-                }
+        query_language = plan.get('query_language', 'en')
+        detail = VISION_DETAIL.get(plan.get('query_type'))
+        analysis_cities = [city for city, image_path in city_images.items() if image_path]
+        analyses = await asyncio.gather(*(
+            self._analyze_city_image(client, city, city_images[city], query_language, local_time_tasks[city], detail)
+            for city in analysis_cities
+        ))
+        analysis_results = dict(zip(analysis_cities, analyses))
+        
+        # Assemble in plan order
+        city_analyses = {}
+        for city in cities:
+            if city in analysis_results:
+                city_analyses[city] = analysis_results[city]
             else:
                 city_analyses[city] = {
                     'status': 'no_camera',
@@ -930,55 +2226,13 @@ Answer concisely in English (3-5 sentences)."""
                 context += f"\n{city}:\n"
                 context += f"- Status: No camera available\n"
         
-        if query_language == 'zh':
-            final_prompt = f"""{context}
-
-Bfored on the above information, answer user's question in Chinese。
-
-Requirements：
-1. If all cities have no camera data：
-   - Honestly explain EarthCam camerfor are currently unavailable
-   - **Proactively provide alternatives**：
-     * Suggest checking official local weather websites
-     * Suggest using Google Maps real-time traffic layer
-     * Suggest checking local environmental agency air quality monitoring data
-     * Provide general advice based on typical city characteristics（such as Los Angeles typically has average air quality, traffic congestion, etc.）
-   
-2. If some cities have camera data, explain honestly and answer based on available data
-
-3. If comparison question, provide clear comparative conclusions
-
-4. Answer professionally and constructively, don't just say"no data"
-
-5. Answer ONLY in Chinese"""
-        else:
-            final_prompt = f"""{context}
-
-Bfored on the above information, answer the user's question in English.
-
-Requirements:
-1. If ALL cities have no camera data:
-   - Honestly explain EarthCam camerfor are currently unavailable
-   - **Proactively provide alternatives**:
-     * Suggest checking official local weather websites
-     * Suggest using Google Maps real-time traffic layer
-     * Suggest checking local environmental agency air quality monitoring data
-     * Provide general insights based on the city's typical characteristics (e.g., LA usually has moderate air quality, heavy traffic, etc.)
-   
-2. If some cities have camera data, explain honestly and answer based on available data
-
-3. If it's a comparison question, provide clear comparative conclusions
-
-4. Answer professionally and constructively, don't just say "no data available"
-
-5. Answer ONLY in English"""
-        
-        final_answer = self.call_llm_text(final_prompt, temperature=0.7)
+        # Static instructions go in the (cacheable) system prompt, the per-query data in the user turn
+        final_system_prompt = FINAL_SYSTEM_PROMPT_ZH if query_language == 'zh' else FINAL_SYSTEM_PROMPT_EN
         
         print("\n" + "="*70)
         print("Answer:")
         print("="*70)
-        print(final_answer)
+        final_answer = await self.call_llm_text_async(client, context, final_system_prompt, temperature=0.7, stream=True)
         
         # Show reference images
         available_images = [data['image_path'] for data in city_analyses.values() if data['status'] == 'success']
@@ -996,18 +2250,25 @@ def main():
     # Check command line arguments
     if len(sys.argv) < 2:
         print("Usage:")
-        print("  python environment_qa.py \"your question\"")
+        print("  python environment_qa.py \"your question\" [--no-cache]")
         print("\nExamples:")
         print("  python environment_qa.py \"What is the weather like in Munich today？\"")
         print("  python environment_qa.py \"How is the traffic at Abbey Road London now?\"")
         print("  python environment_qa.py \"New YorkAre there many people at Times Square now？\"")
+        print("\nOptions:")
+        print("  --no-cache: Don't read or write the on-disk LLM response cache")
         return
     
-    user_query = " ".join(sys.argv[1:])
+    # Parse arguments
+    use_cache = '--no-cache' not in sys.argv
+    user_query = " ".join([arg for arg in sys.argv[1:] if arg != '--no-cache'])
     
     # Create QA system and answer question
-    qa_system = EarthCamQA()
-    qa_system.answer_question(user_query)
+    qa_system = EarthCamQA(use_cache=use_cache)
+    try:
+        qa_system.answer_question(user_query)
+    finally:
+        qa_system.close()
 
 if __name__ == "__main__":
     main()
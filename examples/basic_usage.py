@@ -13,8 +13,8 @@ def example_1_weather_query():
     print("Example 1: Weather Query")
     print("="*70)
     
-    qa = EarthCamQA()
-    qa.answer_question("What's the weather like in London right now?")
+    with EarthCamQA() as qa:
+        qa.answer_question("What's the weather like in London right now?")
 
 def example_2_traffic_query():
     """Example 2: Ask about traffic conditions"""
@@ -22,8 +22,8 @@ def example_2_traffic_query():
     print("Example 2: Traffic Query")
     print("="*70)
     
-    qa = EarthCamQA()
-    qa.answer_question("Is Times Square crowded?")
+    with EarthCamQA() as qa:
+        qa.answer_question("Is Times Square crowded?")
 
 def example_3_multi_city_comparison():
     """Example 3: Compare multiple cities"""
@@ -31,8 +31,8 @@ def example_3_multi_city_comparison():
     print("Example 3: Multi-City Comparison")
     print("="*70)
     
-    qa = EarthCamQA()
-    qa.answer_question("Compare air quality between London and Paris")
+    with EarthCamQA() as qa:
+        qa.answer_question("Compare air quality between London and Paris")
 
 def example_4_chinese_query():
     """Example 4: Query in Chinese"""
@@ -40,8 +40,8 @@ def example_4_chinese_query():
     print("Example 4: Chinese Language Query")
     print("="*70)
     
-    qa = EarthCamQA()
-    qa.answer_question("How is the weather in London now?")
+    with EarthCamQA() as qa:
+        qa.answer_question("How is the weather in London now?")
 
 def example_5_direct_capture():
     """Example 5: Direct image capture from specific camera"""
@@ -49,13 +49,12 @@ def example_5_direct_capture():
     print("Example 5: Direct Image Capture")
     print("="*70)
     
-    qa = EarthCamQA()
-    
     # Capture from specific camera URL
     camera_url = "https://www.earthcam.com/usa/newyork/timessquare/"
     print(f"Capturing from: {camera_url}")
     
-    image_path = qa.capture_camera_image(camera_url)
+    with EarthCamQA() as qa:
+        image_path = qa.capture_camera_image(camera_url)
     
     if image_path:
         print(f"✅ Image saved to: {image_path}")
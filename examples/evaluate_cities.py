@@ -4,16 +4,114 @@ City Coverage Evaluation Script
 Evaluates camera availability across 36 global cities
 
 Usage:
-    python examples/evaluate_cities.py
+    python examples/evaluate_cities.py [--workers N] [--continents europe,asia,...]
+                                       [--output PATH] [--rps N]
 """
 
-import json
+import argparse
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
+
+import orjson
 from environment_qa import EarthCamQA
 
-def evaluate_all_cities():
-    """Evaluate camera availability for all cities"""
+# Concurrent cities per region, candidate cameras probed per city (each on its own QA pool
+# thread), global request budget towards EarthCam shared by all workers
+DEFAULT_WORKERS = 8
+CANDIDATES_PER_CITY = 3
+EARTHCAM_RPS = 4
+
+_print_lock = threading.Lock()
+
+
+def _safe_print(*args, **kwargs):
+    """print() that keeps output from concurrent city workers from interleaving"""
+    with _print_lock:
+        print(*args, **kwargs)
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing acquire() calls at least 1/rate seconds apart
+    
+    Passed to EarthCamQA as request_limiter, which acquires it before every
+    EarthCam search and camera page request (static or browser).
+    """
+    
+    def __init__(self, rate):
+        self._interval = 1.0 / rate
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        # Reserve the next free slot under the lock, sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _record(continent, city, status, url=None, image=None, **extra):
+    """One flat result row; every row has the same core fields regardless of outcome"""
+    return dict({
+        "continent": continent,
+        "city": city,
+        "status": status,
+        "url": url,
+        "image": image,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }, **extra)
+
+
+def process_city(qa_system, continent, city):
+    """Search and capture one city, returning its result record"""
+    try:
+        # Get camera URLs (known, indexed and cached cities don't touch EarthCam)
+        camera_urls = qa_system.search_earthcam(city)
+        
+        if not camera_urls:
+            _safe_print(f"  ❌ {city}: No cameras found")
+            return _record(continent, city, "no_cameras")
+        
+        # Try to capture image (candidate cameras are probed concurrently)
+        image_path, url = qa_system.capture_from_candidates(camera_urls[:CANDIDATES_PER_CITY])
+        
+        if image_path:
+            _safe_print(f"  ✅ {city}: Success: {url[:60]}")
+            return _record(continent, city, "success", url=url, image=image_path)
+        
+        _safe_print(f"  ❌ {city}: All cameras failed")
+        return _record(continent, city, "failed", urls_tried=list(camera_urls[:CANDIDATES_PER_CITY]))
+        
+    except Exception as e:
+        _safe_print(f"  ❌ {city}: Error: {str(e)[:100]}")
+        return _record(continent, city, "error", error=str(e)[:200])
+
+
+def summarize(records):
+    """Per-continent success counts from flat records (continents in first-seen order)"""
+    by_continent = {}
+    for record in records:
+        stats = by_continent.setdefault(record["continent"], {"total": 0, "success": 0})
+        stats["total"] += 1
+        stats["success"] += record["status"] == "success"
+    
+    for stats in by_continent.values():
+        stats["failed"] = stats["total"] - stats["success"]
+        stats["success_rate"] = f"{stats['success'] / stats['total'] * 100:.1f}%"
+    return by_continent
+
+
+def _continent_key(name):
+    return name.lower().replace(" ", "").replace("-", "").replace("_", "")
+
+
+def evaluate_all_cities(workers=DEFAULT_WORKERS, continents=None, output=None, rps=EARTHCAM_RPS):
+    """Evaluate camera availability for all cities (or only the given continents)"""
     
     # Test cities (grouped by region)
     test_cities = {
@@ -42,118 +140,67 @@ def evaluate_all_cities():
         ]
     }
     
-    qa_system = EarthCamQA()
-    
-    results = {
-        "metadata": {
-            "evaluation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "total_cities": sum(len(cities) for cities in test_cities.values()),
-        },
-        "by_continent": {},
-        "summary": {}
-    }
+    if continents:
+        wanted = {_continent_key(name) for name in continents}
+        test_cities = {continent: cities for continent, cities in test_cities.items()
+                       if _continent_key(continent) in wanted}
+        if not test_cities:
+            print(f"No matching continents: {', '.join(continents)}")
+            return None
     
-    total_success = 0
-    total_tested = 0
+    # Every concurrent city probes its candidates on the QA pool at once; a smaller pool
+    # would queue them past CANDIDATE_TIMEOUT and count working cameras as failures
+    qa_system = EarthCamQA(request_limiter=RateLimiter(rps), max_workers=workers * CANDIDATES_PER_CITY)
     
     print("="*80)
     print("City Coverage Evaluation")
     print("="*80)
     
-    for continent, cities in test_cities.items():
-        print(f"\n{'='*80}")
-        print(f"Region: {continent}")
-        print(f"{'='*80}")
-        
-        continent_results = []
-        continent_success = 0
-        
-        for city in cities:
-            total_tested += 1
-            print(f"\n[{total_tested}/{results['metadata']['total_cities']}] {city}")
+    records = []
+    try:
+        for continent, cities in test_cities.items():
+            print(f"\n{'='*80}")
+            print(f"Region: {continent}")
+            print(f"{'='*80}")
             
-            try:
-                # Get camera URLs
-                camera_urls = qa_system.search_earthcam(city)
-                
-                if not camera_urls:
-                    print(f"  ❌ No cameras found")
-                    continent_results.append({
-                        "city": city,
-                        "status": "no_cameras",
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    })
-                    continue
-                
-                # Try to capture image
-                image_captured = False
-                for i, url in enumerate(camera_urls[:3], 1):
-                    print(f"  Trying camera {i}/{min(3, len(camera_urls))}: {url[:60]}...")
-                    
-                    image_path = qa_system.capture_camera_image(url)
-                    if image_path:
-                        print(f"  ✅ Success")
-                        continent_success += 1
-                        total_success += 1
-                        image_captured = True
-                        
-                        continent_results.append({
-                            "city": city,
-                            "url": url,
-                            "status": "success",
-                            "image": image_path,
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        })
-                        break
-                
-                if not image_captured:
-                    print(f"  ❌ All cameras failed")
-                    continent_results.append({
-                        "city": city,
-                        "status": "failed",
-                        "urls_tried": camera_urls[:3],
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    })
-                
-                # Delay to avoid rate limiting
-                time.sleep(2)
-                
-            except Exception as e:
-                print(f"  ❌ Error: {str(e)[:100]}")
-                continent_results.append({
-                    "city": city,
-                    "status": "error",
-                    "error": str(e)[:200],
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
-        
-        # Regional summary
-        success_rate = (continent_success / len(cities) * 100) if cities else 0
-        results["by_continent"][continent] = {
-            "cities": continent_results,
-            "total": len(cities),
-            "success": continent_success,
-            "failed": len(cities) - continent_success,
-            "success_rate": f"{success_rate:.1f}%"
-        }
-        
-        print(f"\n{continent} Summary: {continent_success}/{len(cities)} ({success_rate:.1f}%)")
+            # Cities within a region are independent, probe them in parallel
+            with ThreadPoolExecutor(max_workers=min(workers, len(cities))) as executor:
+                continent_records = list(executor.map(
+                    lambda city: process_city(qa_system, continent, city), cities
+                ))
+            records += continent_records
+            
+            # Regional summary
+            stats = summarize(continent_records)[continent]
+            print(f"\n{continent} Summary: {stats['success']}/{stats['total']} ({stats['success_rate']})")
+    finally:
+        qa_system.close()
     
     # Overall summary
+    total_tested = len(records)
+    total_success = sum(1 for record in records if record["status"] == "success")
     overall_rate = (total_success / total_tested * 100) if total_tested else 0
-    results["summary"] = {
-        "total_tested": total_tested,
-        "total_success": total_success,
-        "total_failed": total_tested - total_success,
-        "overall_success_rate": f"{overall_rate:.1f}%"
+    results = {
+        "metadata": {
+            "evaluation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "total_cities": total_tested,
+        },
+        "records": records,
+        "by_continent": summarize(records),
+        "summary": {
+            "total_tested": total_tested,
+            "total_success": total_success,
+            "total_failed": total_tested - total_success,
+            "overall_success_rate": f"{overall_rate:.1f}%"
+        }
     }
     
     # Save results
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"evaluation_results_{timestamp}.json"
+    filename = output or f"evaluation_results_{timestamp}.json"
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    # orjson writes UTF-8 directly (non-ASCII city names stay readable, like ensure_ascii=False)
+    Path(filename).write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     
     # Final report
     print("\n" + "="*80)
@@ -168,5 +215,22 @@ def evaluate_all_cities():
     
     return results
 
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate EarthCam camera availability across global cities")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent cities per region (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--continents", type=lambda value: [name for name in value.split(",") if name.strip()],
+                        help="Comma-separated regions to evaluate, e.g. europe,asia,north-america (default: all)")
+    parser.add_argument("--output", help="Results JSON path (default: evaluation_results_<timestamp>.json)")
+    parser.add_argument("--rps", type=float, default=EARTHCAM_RPS,
+                        help=f"Max EarthCam requests per second across all workers (default: {EARTHCAM_RPS})")
+    args = parser.parse_args()
+    
+    if args.workers < 1 or args.rps <= 0:
+        parser.error("--workers and --rps must be positive")
+    
+    evaluate_all_cities(workers=args.workers, continents=args.continents, output=args.output, rps=args.rps)
+
+
 if __name__ == "__main__":
-    evaluate_all_cities()
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Camera Index Builder
+Discovers and verifies camera URLs for the supported cities and writes them to
+data/cameras.json, which EarthCamQA loads at startup to skip search_earthcam.
+
+Camera pages change on the scale of days; re-run weekly (e.g. from cron) to refresh.
+
+Usage:
+    python scripts/build_camera_index.py [--cities "London,Paris"] [--workers N] [--output PATH]
+"""
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from environment_qa import CAMERA_INDEX_PATH, KNOWN_CITIES, EarthCamQA, _normalize_city
+
+
+def index_city(qa_system, city):
+    """Return (city, camera URLs that produced a frame)"""
+    print(f"\n--- {city} ---")
+    camera_urls = qa_system.search_with_landmark_fallback(city)
+    
+    working = []
+    for url in camera_urls:
+        if qa_system.capture_camera_image(url):
+            working.append(url)
+            print(f"  ✅ {city}: {url}")
+        else:
+            print(f"  ❌ {city}: {url}")
+    return city, working
+
+
+def _read_index(path):
+    """Existing {city: urls} of an index file, {} if missing or unreadable"""
+    try:
+        return orjson.loads(path.read_bytes()).get("cameras", {})
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+
+
+def build_index(cities, workers=4, output=CAMERA_INDEX_PATH):
+    """Index the given cities and merge them into the directory file
+    
+    Entries for the given cities are replaced (dropped if none works now);
+    other cities already in the file are kept as they are.
+    """
+    # Discover from scratch instead of answering from the index being rebuilt
+    qa_system = EarthCamQA(camera_index=None)
+    try:
+        with ThreadPoolExecutor(max_workers=min(workers, len(cities))) as executor:
+            results = list(executor.map(lambda city: index_city(qa_system, city), cities))
+    finally:
+        qa_system.close()
+    
+    output = Path(output)
+    refreshed = {_normalize_city(city) for city in cities}
+    cameras = {city: urls for city, urls in _read_index(output).items() if _normalize_city(city) not in refreshed}
+    kept = len(cameras)
+    cameras.update((city, urls) for city, urls in results if urls)
+    
+    index = {
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "cameras": cameras
+    }
+    
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(index, option=orjson.OPT_INDENT_2))
+    
+    print(f"\nIndexed {len(cameras) - kept}/{len(cities)} cities ({kept} others kept) -> {output}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline camera URL index")
+    parser.add_argument("--cities", type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+                        default=list(KNOWN_CITIES), help="Comma-separated cities (default: all supported cities)")
+    parser.add_argument("--workers", type=int, default=4, help="Cities indexed concurrently (default: 4)")
+    parser.add_argument("--output", default=CAMERA_INDEX_PATH, help=f"Index path (default: {CAMERA_INDEX_PATH})")
+    args = parser.parse_args()
+    
+    build_index(args.cities, workers=max(1, args.workers), output=args.output)
+
+
+if __name__ == "__main__":
+    main()
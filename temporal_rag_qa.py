@@ -4,24 +4,156 @@ Temporal-RAG Enhanced Environment QA System
 Intelligent Q&A system with historical comparison and trend analysis support
 
 Core Features:
-1. Historical record storage and retrieval (vector database)
+1. Historical record storage and retrieval (FAISS vector index + SQLite)
 2. Temporal comparison queries (today vs yesterday, this week vs last week)
 3. Trend analysis and anomaly detection
 4. Multi-modal knowledge enhancement
 """
 
+import atexit
+import logging
 import os
+import queue
+import re
 import sys
 import json
 import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-import chromadb
-from chromadb.config import Settings
+import faiss
+import numpy as np
 import hashlib
 
+try:
+    import fcntl
+except ImportError:  # Windows: index saves stay atomic, just not serialized across processes
+    fcntl = None
+
 # Import existing QA system
-from environment_qa import EarthCamQA
+from environment_qa import EarthCamQA, INTENT_EMBED_MODEL
+
+# Progress/status messages; answers themselves are always printed. main() attaches the handler.
+log = logging.getLogger("temporal_rag_qa")
+
+# Applied once to the shared connection: WAL lets reads proceed during writes and
+# synchronous=NORMAL only fsyncs at checkpoints instead of on every commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MiB page cache
+    "PRAGMA wal_autocheckpoint=1000",
+)
+
+FLUSH_THRESHOLD = 64   # Largest batch the writer thread inserts at once
+FLUSH_INTERVAL = 0.5   # Seconds the writer thread waits for more records before inserting a partial batch
+_FLUSH = object()      # Queue marker from flush(): store the batch being collected without waiting out FLUSH_INTERVAL
+STATS_CACHE_TTL = 60  # Seconds get_historical_stats results are reused while no new records arrive
+EMBED_MODEL = INTENT_EMBED_MODEL
+EMBED_DIM = 384
+EMBED_BATCH_SIZE = 32
+QUANTIZE_MIN_VECTORS = 10000  # Exact float32 index until this many vectors, then int8 scalar quantization
+INDEX_SAVE_EVERY = 16  # Stored batches between vector index file writes (close() writes the rest)
+
+# (category, label, keywords); within a category the first label (in this order) with any
+# keyword in the text wins
+_CONDITION_KEYWORDS = (
+    ('weather', 'sunny', r'sunny|sunshine|clear'),
+    ('weather', 'cloudy', r'cloudy|overcast'),
+    ('weather', 'rainy', r'rain'),
+    ('weather', 'snowy', r'snow'),
+    ('traffic', 'heavy', r'congested|traffic jam'),
+    ('traffic', 'moderate', r'moderate traffic|normal'),
+    ('traffic', 'light', r'smooth|light traffic'),
+    ('people', 'high', r'crowded|dense'),
+    ('people', 'moderate', r'moderate|normal crowd'),
+    ('people', 'low', r'sparse|spacious|few people'),
+)
+# All labels in one pattern, one optional lookahead (group "<category>_<label>") each, so a
+# single match call finds every label independently: overlapping phrases ("normal crowd"
+# for people, "normal" for traffic) count for every category that lists them
+_RE_CONDITIONS = re.compile(''.join(f'(?=.*?(?P<{category}_{label}>{keywords}))?'
+                                    for category, label, keywords in _CONDITION_KEYWORDS), re.IGNORECASE | re.DOTALL)
+_CONDITION_CATEGORIES = ('weather', 'traffic', 'people')
+
+# Temporal comparison phrasing, one group per comparison type
+_RE_COMPARISON_TYPE = re.compile(r'\b(?:(?P<yesterday>yesterday|last time)|(?P<last_week>last week|(?:one )?week ago)'
+                                 r'|(?P<general>compare|comparison|vs|compared to)|(?P<trend>trend|change))',
+                                 re.IGNORECASE)
+_COMPARISON_PRIORITY = ('yesterday', 'last_week', 'general', 'trend')
+
+# Timestamps are stored as INTEGER unix seconds (integer range scans, compact index keys).
+# Selecting a column as "name [epoch]" (PARSE_COLNAMES) hands it back as a local datetime.
+sqlite3.register_converter('epoch', lambda value: datetime.fromtimestamp(int(value)))
+
+# Bumped whenever _init_sql_db changes the schema; stored in PRAGMA user_version
+SCHEMA_VERSION = 2
+
+_RECORDS_COLUMNS = """(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    city TEXT NOT NULL,
+    camera_url TEXT NOT NULL,
+    image_path TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    weather TEXT,
+    traffic_level TEXT,
+    people_density TEXT,
+    timestamp INTEGER NOT NULL,
+    hour_of_day INTEGER,
+    day_of_week INTEGER,
+    created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+    vector_row INTEGER,
+    content_hash BLOB
+)"""
+
+# Hot-path statements, passed as the same string objects on every call so they are
+# always served prepared from the connection's statement cache
+SQLITE_CACHED_STATEMENTS = 512
+_SQL_INSERT = """
+    INSERT OR IGNORE INTO camera_records 
+    (city, camera_url, image_path, analysis, weather, traffic_level, 
+     people_density, timestamp, hour_of_day, day_of_week, content_hash, vector_row)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_QUERY_BY_TIME = """
+    SELECT city, camera_url, image_path, analysis, weather, 
+           traffic_level, people_density, timestamp AS "timestamp [epoch]"
+    FROM camera_records
+    WHERE city = ? AND timestamp BETWEEN ? AND ?
+    ORDER BY timestamp DESC
+"""
+# Hashes are 16 bytes, so a 64-record batch stays far below SQLite's bound-parameter limit
+_SQL_EXISTING_HASHES = "SELECT content_hash FROM camera_records WHERE content_hash IN ({})"
+_SQL_CITY_VECTOR_ROWS = "SELECT vector_row FROM camera_records WHERE city = ? AND vector_row IS NOT NULL"
+# Stats read whole days from camera_stats_daily, kept current by a trigger, so they cost
+# O(days x label combinations) rows instead of a scan over every record in the window. Only
+# the partial (UTC) day at the start of the window is counted from camera_records itself.
+# Parameters: city, first whole day, city, window start, first whole day's start (unix seconds)
+_SQL_STATS_TOTALS = """
+    SELECT COALESCE(SUM(cnt), 0), COUNT(DISTINCT day)
+    FROM (
+        SELECT day, cnt FROM camera_stats_daily WHERE city = ? AND day >= ?
+        UNION ALL
+        SELECT timestamp / 86400, 1 FROM camera_records WHERE city = ? AND timestamp >= ? AND timestamp < ?
+    )
+"""
+# (stats key, query): one GROUP BY per dimension instead of the cube of all three
+_SQL_STATS_DISTRIBUTIONS = tuple(
+    (key, f"""
+    SELECT label, SUM(cnt)
+    FROM (
+        SELECT {column} AS label, cnt FROM camera_stats_daily WHERE city = ? AND day >= ?
+        UNION ALL
+        SELECT COALESCE({record_column}, 'unknown'), 1 FROM camera_records
+        WHERE city = ? AND timestamp >= ? AND timestamp < ?
+    )
+    GROUP BY label
+""") for key, column, record_column in (('weather_distribution', 'weather', 'weather'),
+                                         ('traffic_distribution', 'traffic', 'traffic_level'),
+                                         ('people_distribution', 'people', 'people_density'))
+)
 
 class TemporalRAG:
     """Temporal-aware RAG system"""
@@ -31,65 +163,221 @@ class TemporalRAG:
         self.db_path = db_path
         os.makedirs(db_path, exist_ok=True)
         
-        # Initialize vector database (ChromaDB)
-        self.chroma_client = chromadb.PersistentClient(
-            path=os.path.join(db_path, "chroma")
-        )
-        
-        # Create collection
-        try:
-            self.collection = self.chroma_client.get_collection("camera_history")
-        except:
-            self.collection = self.chroma_client.create_collection(
-                name="camera_history",
-                metadata={"description": "Historical camera analysis records"}
-            )
+        # Initialize vector index (inner product over unit vectors = cosine similarity); exact
+        # float32 at first, int8 once large enough to train the quantizer (_maybe_quantize).
+        # Vector row i belongs to the camera_records row whose vector_row is i.
+        self.index_path = os.path.join(db_path, "vectors.faiss")
+        if os.path.exists(self.index_path):
+            self.index = faiss.read_index(self.index_path)
+        else:
+            self.index = faiss.IndexFlatIP(EMBED_DIM)
         
-        # Initialize text encoder (using simple TF-IDF or hash method)
-        print("  [RAG] Using lightweight text encoding...")
-        # No additional encoder needed, using ChromaDB's built-in embedding
+        # Initialize text encoder
+        log.info("  [RAG] Loading text encoder %s...", EMBED_MODEL)
+        from sentence_transformers import SentenceTransformer
+        self.embedder = SentenceTransformer(EMBED_MODEL)
         
         # Initialize SQLite for structured data
         self.sql_db_path = os.path.join(db_path, "records.db")
+        # One autocommit connection for the lifetime of the object, serialized by a lock
+        self._conn = sqlite3.connect(self.sql_db_path, check_same_thread=False, isolation_level=None,
+                                     cached_statements=SQLITE_CACHED_STATEMENTS,
+                                     detect_types=sqlite3.PARSE_COLNAMES)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        for pragma in SQLITE_PRAGMAS:
+            self._conn.execute(pragma)
         self._init_sql_db()
-        
-        print(f"  [RAG] Initialization complete, storage path: {db_path}")
+        # Batches added to the index since it was last written to index_path
+        self._unsaved_batches = 0
+        self._verify_index()
+        self._backfill_vectors()
+        
+        # add_record only enqueues; a single writer thread batches records into FAISS and SQLite
+        self._queue = queue.Queue()
+        # Bumped after every stored batch; part of the stats cache key, so writes invalidate it
+        self._write_gen = 0
+        self._stats_cache: Dict[Tuple, Tuple[float, Dict]] = {}
+        self._flush_threshold = FLUSH_THRESHOLD
+        self._writer = threading.Thread(target=self._writer_loop, name="rag-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+        
+        log.info("  [RAG] Initialization complete, storage path: %s", db_path)
     
     def _init_sql_db(self):
         """Initialize SQLite database"""
-        conn = sqlite3.connect(self.sql_db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
         
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS camera_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                city TEXT NOT NULL,
-                camera_url TEXT NOT NULL,
-                image_path TEXT NOT NULL,
-                analysis TEXT NOT NULL,
-                weather TEXT,
-                traffic_level TEXT,
-                people_density TEXT,
-                timestamp DATETIME NOT NULL,
-                hour_of_day INTEGER,
-                day_of_week INTEGER,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # Already current: skip the column checks, migrations and CREATE ... IF NOT EXISTS round trips
+        if cursor.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return
+        
+        cursor.execute("BEGIN")
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS camera_records {_RECORDS_COLUMNS}")
+        
+        # Databases created before the FAISS index have no vector_row column
+        columns = {row[1]: row[2] for row in cursor.execute("PRAGMA table_info(camera_records)")}
+        if 'vector_row' not in columns:
+            cursor.execute("ALTER TABLE camera_records ADD COLUMN vector_row INTEGER")
+        # ... nor content_hash (their rows keep NULL, which the unique index allows repeatedly)
+        if 'content_hash' not in columns:
+            cursor.execute("ALTER TABLE camera_records ADD COLUMN content_hash BLOB")
         
-        # Create indexes
+        # Databases created before epoch timestamps store ISO text (DATETIME); rebuild the table
+        if columns['timestamp'] != 'INTEGER':
+            self._migrate_timestamps(cursor)
+        
+        # Create indexes. The (city, timestamp) index covers every column query_by_time reads,
+        # so time-window lookups never touch the table itself.
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_city_time 
-            ON camera_records(city, timestamp)
+            CREATE INDEX IF NOT EXISTS idx_city_time_cover 
+            ON camera_records(city, timestamp DESC, camera_url, image_path, analysis,
+                              weather, traffic_level, people_density)
         """)
+        # Superseded by the covering index
+        cursor.execute("DROP INDEX IF EXISTS idx_city_time")
         
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_city_hour_dow 
             ON camera_records(city, hour_of_day, day_of_week)
         """)
         
-        conn.commit()
-        conn.close()
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_vector_row 
+            ON camera_records(vector_row)
+        """)
+        
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_content_hash 
+            ON camera_records(content_hash)
+        """)
+        
+        # Per-day record counts by (UTC) day and label combination
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS camera_stats_daily (
+                city TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                weather TEXT NOT NULL,
+                traffic TEXT NOT NULL,
+                people TEXT NOT NULL,
+                cnt INTEGER NOT NULL,
+                PRIMARY KEY (city, day, weather, traffic, people)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_update_stats AFTER INSERT ON camera_records
+            BEGIN
+                INSERT INTO camera_stats_daily (city, day, weather, traffic, people, cnt)
+                VALUES (NEW.city, NEW.timestamp / 86400, COALESCE(NEW.weather, 'unknown'),
+                        COALESCE(NEW.traffic_level, 'unknown'), COALESCE(NEW.people_density, 'unknown'), 1)
+                ON CONFLICT (city, day, weather, traffic, people) DO UPDATE SET cnt = cnt + 1;
+            END
+        """)
+        # Rebuilt from the records on every schema upgrade, so it also covers rows from before the trigger
+        cursor.execute("DELETE FROM camera_stats_daily")
+        cursor.execute("""
+            INSERT INTO camera_stats_daily (city, day, weather, traffic, people, cnt)
+            SELECT city, timestamp / 86400, COALESCE(weather, 'unknown'),
+                   COALESCE(traffic_level, 'unknown'), COALESCE(people_density, 'unknown'), COUNT(*)
+            FROM camera_records
+            GROUP BY 1, 2, 3, 4, 5
+        """)
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        cursor.execute("COMMIT")
+    
+    def _migrate_timestamps(self, cursor):
+        """Copy a DATETIME-schema table into the INTEGER-timestamp schema, inside the caller's transaction
+        
+        The caller has already added any missing vector_row/content_hash columns, so both are copied.
+        """
+        log.info("  [RAG] Migrating timestamps to unix seconds...")
+        # Text written by the old default datetime adapter (local wall time)
+        self._conn.create_function(
+            'local_epoch', 1, lambda text: int(datetime.fromisoformat(text).timestamp()), deterministic=True)
+        cursor.execute("ALTER TABLE camera_records RENAME TO camera_records_legacy")
+        cursor.execute(f"CREATE TABLE camera_records {_RECORDS_COLUMNS}")
+        cursor.execute("""
+            INSERT INTO camera_records
+            (id, city, camera_url, image_path, analysis, weather, traffic_level, people_density,
+             timestamp, hour_of_day, day_of_week, created_at, vector_row, content_hash)
+            SELECT id, city, camera_url, image_path, analysis, weather, traffic_level, people_density,
+                   local_epoch(timestamp), hour_of_day, day_of_week,
+                   CAST(strftime('%s', created_at) AS INTEGER), vector_row, content_hash
+            FROM camera_records_legacy
+        """)
+        # Drops the legacy indexes too; they are recreated on the new table
+        cursor.execute("DROP TABLE camera_records_legacy")
+    
+    def _verify_index(self):
+        """Start over from an empty index when the loaded one doesn't match the records' vector rows
+        
+        An index file saved before a crash, or overwritten by another process, has
+        ntotal != MAX(vector_row) + 1 or records sharing a row; only re-embedding
+        guarantees every record points at its own vector again.
+        """
+        max_row, rows, distinct_rows = self._conn.execute(
+            "SELECT MAX(vector_row), COUNT(vector_row), COUNT(DISTINCT vector_row) FROM camera_records"
+        ).fetchone()
+        expected = 0 if max_row is None else max_row + 1
+        if self.index.ntotal == expected and rows == distinct_rows:
+            return
+        
+        log.info("  [RAG] Vector index holds %d vectors, records expect %d; rebuilding...",
+                 self.index.ntotal, expected)
+        self.index = faiss.IndexFlatIP(EMBED_DIM)
+        self._conn.execute("UPDATE camera_records SET vector_row = NULL")
+    
+    def _save_index(self):
+        """Write the vector index atomically, serialized across processes by a lock file"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(f"{self.index_path}.lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # Released when the file closes
+            faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+        self._unsaved_batches = 0
+    
+    def _backfill_vectors(self):
+        """Embed records missing from the vector index (legacy rows, or after _verify_index started over)"""
+        rows = self._conn.execute(
+            "SELECT id, analysis FROM camera_records WHERE vector_row IS NULL ORDER BY id"
+        ).fetchall()
+        if not rows:
+            return
+        
+        log.info("  [RAG] Indexing %d records...", len(rows))
+        embeddings = self._embed([analysis for _, analysis in rows])
+        start = self.index.ntotal
+        with self._conn:  # COMMIT, or ROLLBACK if anything in the block raises
+            self._conn.execute("BEGIN")
+            self._conn.executemany("UPDATE camera_records SET vector_row = ? WHERE id = ?",
+                                   [(start + i, record_id) for i, (record_id, _) in enumerate(rows)])
+        self.index.add(embeddings)
+        self._maybe_quantize()
+        self._save_index()
+    
+    def _maybe_quantize(self):
+        """Swap the flat index for an 8-bit scalar quantized one (4x smaller) once enough vectors exist to train it"""
+        if not isinstance(self.index, faiss.IndexFlat) or self.index.ntotal < QUANTIZE_MIN_VECTORS:
+            return
+        
+        log.info("  [RAG] Quantizing %d vectors to int8...", self.index.ntotal)
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        quantized = faiss.IndexScalarQuantizer(EMBED_DIM, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        quantized.train(vectors)
+        # Re-added in the same order, so vector rows (and camera_records.vector_row) are unchanged
+        quantized.add(vectors)
+        self.index = quantized
+    
+    def _embed(self, texts):
+        """Unit-norm float32 embeddings, one row per text, as a C-contiguous array faiss takes as-is"""
+        embeddings = self.embedder.encode(texts, batch_size=EMBED_BATCH_SIZE, convert_to_numpy=True)
+        # No copy when the encoder already returned contiguous float32 (the usual case)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)  # In place, in C++
+        return embeddings
     
     def add_record(self, city: str, camera_url: str, image_path: str, 
                    analysis: str, timestamp: datetime = None):
@@ -97,248 +385,308 @@ class TemporalRAG:
         if timestamp is None:
             timestamp = datetime.now()
         
-        # Extract structured information
-        weather = self._extract_weather(analysis)
-        traffic_level = self._extract_traffic(analysis)
-        people_density = self._extract_people(analysis)
-        
-        # 1. Add to vector database (using ChromaDB built-in embedding)
         record_id = f"{city}_{timestamp.strftime('%Y%m%d_%H%M%S')}"
         
-        self.collection.add(
-            documents=[analysis],  # ChromaDB will automatically generate embedding
-            metadatas=[{
-                'city': city,
-                'camera_url': camera_url,
-                'image_path': image_path,
-                'timestamp': timestamp.isoformat(),
-                'weather': weather,
-                'traffic_level': traffic_level,
-                'people_density': people_density,
-                'hour': timestamp.hour,
-                'day_of_week': timestamp.weekday()
-            }],
-            ids=[record_id]
-        )
-        
-        # 2. Add to SQL database (for temporal queries)
-        conn = sqlite3.connect(self.sql_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO camera_records 
-            (city, camera_url, image_path, analysis, weather, traffic_level, 
-             people_density, timestamp, hour_of_day, day_of_week)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (city, camera_url, image_path, analysis, weather, traffic_level,
-              people_density, timestamp, timestamp.hour, timestamp.weekday()))
-        
-        conn.commit()
-        conn.close()
+        # Stored in the background, off the answer path; reads wait for queued records
+        self._queue.put((city, camera_url, image_path, analysis, timestamp))
         
         return record_id
     
-    def _extract_weather(self, analysis: str) -> str:
-        """Extract weather information from analysis text"""
-        analysis_lower = analysis.lower()
-        
-        if any(w in analysis_lower for w in ['sunny', 'sunny', 'sunshine', 'clear']):
-            return 'sunny'
-        elif any(w in analysis_lower for w in ['cloudy', 'cloudy', 'overcast']):
-            return 'cloudy'
-        elif any(w in analysis_lower for w in ['rain', 'rain', 'raining']):
-            return 'rainy'
-        elif any(w in analysis_lower for w in ['snow', 'snow', 'snowing']):
-            return 'snowy'
-        else:
-            return 'unknown'
+    def flush(self):
+        """Block until every queued record is in the vector index and SQLite"""
+        if self._writer.is_alive():
+            self._queue.put(_FLUSH)
+        self._queue.join()
     
-    def _extract_traffic(self, analysis: str) -> str:
-        """Extract traffic conditions from analysis text"""
-        analysis_lower = analysis.lower()
-        
-        if any(w in analysis_lower for w in ['congested', 'congested', 'traffic jam', 'traffic jam']):
-            return 'heavy'
-        elif any(w in analysis_lower for w in ['moderate traffic', 'moderate traffic', 'normal']):
-            return 'moderate'
-        elif any(w in analysis_lower for w in ['smooth', 'light traffic', 'light traffic', 'smooth']):
-            return 'light'
-        else:
-            return 'unknown'
+    def _writer_loop(self):
+        """Drain the queue in batches of up to FLUSH_THRESHOLD records or FLUSH_INTERVAL seconds
+        
+        A _FLUSH marker ends the batch early; None stores what was collected and stops.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            if item is _FLUSH:
+                self._queue.task_done()
+                continue
+            
+            batch = [item]
+            stop = flushed = False
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < self._flush_threshold:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                if item is _FLUSH:
+                    flushed = True
+                    break
+                batch.append(item)
+            
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                log.warning("  [RAG] ✗ Failed to store %d records: %s", len(batch), e)
+            finally:
+                for _ in range(len(batch) + stop + flushed):
+                    self._queue.task_done()
+            if stop:
+                return
     
-    def _extract_people(self, analysis: str) -> str:
-        """Extract crowd density from analysis text"""
-        analysis_lower = analysis.lower()
-        
-        if any(w in analysis_lower for w in ['crowded', 'crowded', 'crowded', 'dense']):
-            return 'high'
-        elif any(w in analysis_lower for w in ['moderate crowd', 'moderate', 'normal crowd']):
-            return 'moderate'
-        elif any(w in analysis_lower for w in ['sparse crowd', 'sparse', 'spacious', 'few people']):
-            return 'low'
-        else:
-            return 'unknown'
+    def _write_batch(self, batch):
+        """Batch insert of (city, camera_url, image_path, analysis, timestamp) records"""
+        # Steady cameras often produce the same analysis again; a city's identical analyses are
+        # stored once per (UTC) day, so the same conditions on a later day still get their own record
+        hashed = {}
+        for record in batch:
+            day = int(record[4].timestamp()) // 86400
+            content_hash = hashlib.blake2b(f"{record[0]}\0{day}\0{record[3]}".encode(), digest_size=16).digest()
+            hashed.setdefault(content_hash, record)
+        with self._lock:
+            placeholders = ",".join("?" * len(hashed))
+            existing = {row[0] for row in self._conn.execute(_SQL_EXISTING_HASHES.format(placeholders), list(hashed))}
+        
+        rows = []
+        for content_hash, (city, camera_url, image_path, analysis, timestamp) in hashed.items():
+            if content_hash in existing:
+                continue
+            # Extract structured information
+            weather, traffic_level, people_density = self._classify(analysis)
+            rows.append((city, camera_url, image_path, analysis, weather, traffic_level, people_density,
+                         int(timestamp.timestamp()), timestamp.hour, timestamp.weekday(), content_hash))
+        if not rows:
+            return
+        embeddings = self._embed([row[3] for row in rows])
+        
+        with self._lock:
+            # 1. SQL rows (for temporal queries), each pointing at the vector row it will get
+            # (vectors are appended, so this batch starts at ntotal). One transaction per batch,
+            # so the whole batch costs a single commit and a failure rolls all of it back,
+            # leaving the connection usable for the next batch. OR IGNORE covers a duplicate
+            # written by another process since the check above (its vector is never hit).
+            start = self.index.ntotal
+            with self._conn:  # COMMIT, or ROLLBACK if anything in the block raises
+                self._conn.execute("BEGIN")
+                self._conn.executemany(_SQL_INSERT, [row + (start + i,) for i, row in enumerate(rows)])
+            
+            # 2. Vector index, only once the rows are committed: a failed batch adds no
+            # vectors, so it can't shift the rows of every batch after it
+            self.index.add(embeddings)
+            self._maybe_quantize()
+            
+            # Writing the whole index is O(ntotal), so it is saved every few batches, not per batch
+            self._unsaved_batches += 1
+            if self._unsaved_batches >= INDEX_SAVE_EVERY:
+                self._save_index()
+            self._write_gen += 1
+    
+    def _classify(self, analysis: str) -> Tuple[str, str, str]:
+        """Extract (weather, traffic level, crowd density) from analysis text in one match call"""
+        found = _RE_CONDITIONS.match(analysis).groupdict()  # Every lookahead is optional, so it always matches
+        labels = {}
+        for category, label, _ in _CONDITION_KEYWORDS:
+            if found[f'{category}_{label}'] is not None:
+                labels.setdefault(category, label)
+        return tuple(labels.get(category, 'unknown') for category in _CONDITION_CATEGORIES)
     
     def query_by_time(self, city: str, target_time: datetime, 
                       time_window: int = 30) -> List[Dict]:
         """Query historical records by time (for temporal comparison)"""
-        conn = sqlite3.connect(self.sql_db_path)
-        cursor = conn.cursor()
+        self.flush()
+        start_time = int((target_time - timedelta(minutes=time_window)).timestamp())
+        end_time = int((target_time + timedelta(minutes=time_window)).timestamp())
         
-        start_time = target_time - timedelta(minutes=time_window)
-        end_time = target_time + timedelta(minutes=time_window)
-        
-        cursor.execute("""
-            SELECT city, camera_url, image_path, analysis, weather, 
-                   traffic_level, people_density, timestamp
-            FROM camera_records
-            WHERE city = ? AND timestamp BETWEEN ? AND ?
-            ORDER BY timestamp DESC
-        """, (city, start_time, end_time))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'city': row[0],
-                'camera_url': row[1],
-                'image_path': row[2],
-                'analysis': row[3],
-                'weather': row[4],
-                'traffic_level': row[5],
-                'people_density': row[6],
-                'timestamp': datetime.fromisoformat(row[7])
-            })
-        
-        conn.close()
-        return results
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(_SQL_QUERY_BY_TIME, (city, start_time, end_time))]
     
     def query_similar(self, query: str, city: str = None, k: int = 5) -> List[Dict]:
         """Semantic similarity retrieval"""
-        where = {"city": city} if city else None
-        
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=k,
-            where=where
-        )
-        
-        if not results['documents'] or not results['documents'][0]:
-            return []
+        self.flush()
+        query_embedding = self._embed([query])
+        
+        with self._lock:
+            params = None
+            if city:
+                # Restrict the exact search to this city's vectors
+                city_rows = [row[0] for row in self._conn.execute(_SQL_CITY_VECTOR_ROWS, (city,))]
+                if not city_rows:
+                    return []
+                params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(np.array(city_rows, dtype='int64')))
+            
+            scores, vector_rows = self.index.search(query_embedding, k, params=params)
+            hits = {int(row): float(score) for row, score in zip(vector_rows[0], scores[0]) if row >= 0}
+            if not hits:
+                return []
+            
+            placeholders = ",".join("?" * len(hits))
+            rows = self._conn.execute(f"""
+                SELECT vector_row, city, camera_url, image_path, analysis, weather,
+                       traffic_level, people_density, timestamp AS "timestamp [epoch]"
+                FROM camera_records
+                WHERE vector_row IN ({placeholders})
+            """, list(hits)).fetchall()
         
         similar_records = []
-        for i in range(len(results['documents'][0])):
+        for row in rows:
+            timestamp = row['timestamp']
             similar_records.append({
-                'id': results['ids'][0][i],
-                'analysis': results['documents'][0][i],
-                'metadata': results['metadatas'][0][i],
-                'distance': results['distances'][0][i] if 'distances' in results else None
+                'id': f"{row['city']}_{timestamp.strftime('%Y%m%d_%H%M%S')}",
+                'analysis': row['analysis'],
+                'metadata': {
+                    'city': row['city'],
+                    'camera_url': row['camera_url'],
+                    'image_path': row['image_path'],
+                    'timestamp': timestamp.isoformat(),
+                    'weather': row['weather'],
+                    'traffic_level': row['traffic_level'],
+                    'people_density': row['people_density'],
+                    'hour': timestamp.hour,
+                    'day_of_week': timestamp.weekday()
+                },
+                'distance': 1.0 - hits[row['vector_row']]  # Cosine distance
             })
         
+        similar_records.sort(key=lambda record: record['distance'])
         return similar_records
     
     def get_historical_stats(self, city: str, hours: int = 24) -> Dict:
-        """Get historical statistics"""
-        conn = sqlite3.connect(self.sql_db_path)
-        cursor = conn.cursor()
+        """Get historical statistics for the records of the last `hours` hours"""
+        self.flush()
+        key = (city, hours, self._write_gen)
+        cached = self._stats_cache.get(key)
+        if cached and time.time() - cached[0] < STATS_CACHE_TTL:
+            return cached[1]
         
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        cutoff = int(time.time()) - hours * 3600
+        first_day = -(-cutoff // 86400)  # First whole (UTC) day in the window
+        params = (city, first_day, city, cutoff, first_day * 86400)
         
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_records,
-                COUNT(DISTINCT DATE(timestamp)) as days_covered,
-                weather,
-                traffic_level,
-                people_density
-            FROM camera_records
-            WHERE city = ? AND timestamp >= ?
-            GROUP BY weather, traffic_level, people_density
-        """, (city, cutoff_time))
+        with self._lock:
+            total_records, days_covered = self._conn.execute(_SQL_STATS_TOTALS, params).fetchone()
+            distributions = {key: dict(self._conn.execute(sql, params)) for key, sql in _SQL_STATS_DISTRIBUTIONS}
         
         stats = {
             'city': city,
-            'total_records': 0,
-            'days_covered': 0,
-            'weather_distribution': {},
-            'traffic_distribution': {},
-            'people_distribution': {}
+            'total_records': total_records,
+            'days_covered': days_covered,
+            **distributions
         }
         
-        for row in cursor.fetchall():
-            stats['total_records'] += row[0]
-            stats['days_covered'] = max(stats['days_covered'], row[1])
-            
-            if row[2]:
-                stats['weather_distribution'][row[2]] = stats['weather_distribution'].get(row[2], 0) + row[0]
-            if row[3]:
-                stats['traffic_distribution'][row[3]] = stats['traffic_distribution'].get(row[3], 0) + row[0]
-            if row[4]:
-                stats['people_distribution'][row[4]] = stats['people_distribution'].get(row[4], 0) + row[0]
-        
-        conn.close()
+        # Entries from older write generations can never be hit again
+        self._stats_cache = {cached_key: entry for cached_key, entry in self._stats_cache.items()
+                             if cached_key[2] == key[2]}
+        self._stats_cache[key] = (time.time(), stats)
         return stats
+    
+    def close(self):
+        """Store queued records, save the vector index and close the SQLite connection
+        
+        Idempotent, also registered with atexit.
+        """
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._lock:
+            if self._unsaved_batches:
+                self._save_index()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def configure_logging(level=logging.INFO):
+    """Send status messages to stdout
+    
+    Written straight through (no buffering handler) so they stay in order with the
+    base system's print() output and the streamed answer on the same stream.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(level)
+    log.propagate = False
+
+
+_rag_singleton: Optional[TemporalRAG] = None
+_rag_singleton_lock = threading.Lock()
+
+
+def get_rag() -> TemporalRAG:
+    """Process-wide TemporalRAG, created on first use so the index and encoder load only once"""
+    global _rag_singleton
+    with _rag_singleton_lock:
+        if _rag_singleton is None or _rag_singleton._conn is None:
+            _rag_singleton = TemporalRAG()
+        return _rag_singleton
 
 
 class TemporalRAGQA(EarthCamQA):
     """RAG-enhanced Environment QA System"""
     
-    def __init__(self, api_key=os.getenv("SILICONFLOW_API_KEY"), enable_rag=True):
-        super().__init__(api_key)
+    def __init__(self, api_key=os.getenv("SILICONFLOW_API_KEY"), enable_rag=True, use_cache=True):
+        super().__init__(api_key, use_cache=use_cache)
         self.enable_rag = enable_rag
         
         if enable_rag:
-            print("[RAG] Initializing Temporal RAG system...")
-            self.rag = TemporalRAG()
-            print("[RAG] Initialization complete\n")
+            log.info("[RAG] Initializing Temporal RAG system...")
+            self.rag = get_rag()
+            # Same model as the intent cache's near-duplicate matching, so don't load it twice
+            self._intent_embedder = self.rag.embedder
+            log.info("[RAG] Initialization complete\n")
         else:
             self.rag = None
     
+    def close(self):
+        """Release the QA system's resources; the shared RAG store is flushed, and closed at exit"""
+        super().close()
+        if self.rag:
+            self.rag.flush()
+    
     def _is_comparison_query(self, query: str) -> Tuple[bool, Optional[str]]:
         """Determine if it's a comparison query, returns (is_comparison, comparison_type)"""
-        query_lower = query.lower()
-        
-        # Detect time comparison keywords
-        if any(w in query_lower for w in ['yesterday', 'last time']):
-            return True, 'yesterday'
-        elif any(w in query_lower for w in ['last week', 'last week', 'one week ago', 'week ago']):
-            return True, 'last_week'
-        elif any(w in query_lower for w in ['compare', 'compare', 'vs', 'comparison', 'compared to']):
-            return True, 'general'
-        elif any(w in query_lower for w in ['trend', 'trend', 'change', 'change']):
-            return True, 'trend'
-        
-        return False, None
+        # Detect time comparison keywords; "compare with yesterday" is still a 'yesterday' comparison
+        found = {match.lastgroup for match in _RE_COMPARISON_TYPE.finditer(query)}
+        if not found:
+            return False, None
+        return True, next(comparison_type for comparison_type in _COMPARISON_PRIORITY if comparison_type in found)
     
     def answer_question_with_rag(self, user_query: str):
         """RAG-enhanced Q&A"""
-        print("="*70)
-        print("Temporal RAG Enhanced Environment QA System")
-        print("="*70)
-        print(f"\nUser question: {user_query}\n")
-        print("-"*70)
+        log.info("="*70)
+        log.info("Temporal RAG Enhanced Environment QA System")
+        log.info("="*70)
+        log.info("\nUser question: %s\n", user_query)
+        log.info("-"*70)
         
         # Step1: Analyze user intent
-        print("\n[Step1] Analyzing user intent...")
+        log.info("\n[Step1] Analyzing user intent...")
         intent = self.analyze_user_intent(user_query)
         
         if not intent:
             return "Sorry, I cannot understand your question."
         
-        print(f"  Intent analysis result:")
-        print(f"    Requires camera: {intent.get('is_camera_query')}")
+        log.info("  Intent analysis result:")
+        log.info("    Requires camera: %s", intent.get('is_camera_query'))
         if intent.get('city'):
-            print(f"    Target city: {intent.get('city')}")
+            log.info("    Target city: %s", intent.get('city'))
         if intent.get('query_type'):
-            print(f"    Query type: {intent.get('query_type')}")
+            log.info("    Query type: %s", intent.get('query_type'))
+        if intent.get('visual_method'):
+            log.debug("    Visual method: %s", intent.get('visual_method'))
         
         # Check if it's a comparison query
         is_comparison, comparison_type = self._is_comparison_query(user_query)
         if is_comparison:
-            print(f"    Comparison type: {comparison_type}")
+            log.info("    Comparison type: %s", comparison_type)
         
         # If not a camera query, directly answer
         if not intent.get('is_camera_query'):
-            print("\n[Note] User question not related to live camera")
+            log.info("\n[Note] User question not related to live camera")
             response = self.call_llm_text(user_query, temperature=0.7)
             print("\n" + "="*70)
             print("Answer:")
@@ -351,33 +699,23 @@ class TemporalRAGQA(EarthCamQA):
             return "Sorry, I cannot identify the city you want to query."
         
         # Step2: Search for cameras
-        print("\n[Step2] Searching EarthCam cameras...")
+        log.info("\n[Step2] Searching EarthCam cameras...")
         camera_urls = self.search_earthcam(city, intent.get('country', ''))
         
         if not camera_urls:
             return f"Sorry, I did not find cameras in{city}."
         
-        print(f"  ✓ Found {len(camera_urls)} cameras")
+        log.info("  ✓ Found %d cameras", len(camera_urls))
         
         # Step3: Capture current image
-        print(f"\n[Step3] Capturing current image...")
-        current_image_path = None
-        current_camera_url = None
-        
-        for i, camera_url in enumerate(camera_urls[:3], 1):
-            print(f"\n  Trying camera {i}/{min(3, len(camera_urls))}: {camera_url}")
-            image_path = self.capture_camera_image(camera_url)
-            
-            if image_path:
-                current_image_path = image_path
-                current_camera_url = camera_url
-                break
+        log.info("\n[Step3] Capturing current image...")
+        current_image_path, current_camera_url = self.capture_from_candidates(camera_urls[:3])
         
         if not current_image_path:
             return f"Sorry, {city}'s cameras are temporarily unavailable."
         
         # Step4: Analyze current image
-        print(f"\n[Step4] Analyzing current image with vision LLM...")
+        log.info("\n[Step4] Analyzing current image with vision LLM...")
         
         vision_prompt = f"""Please carefully observe this live camera image and describe in detail:
 
@@ -393,15 +731,17 @@ Please provide specific and accurate observations."""
         if not current_analysis:
             return "Sorry, Image analysis failed."
         
-        print(f"  ✓ Current analysis complete")
+        log.info("  ✓ Current analysis complete")
         
-        # Step5: RAG enhancement (if enabled and is comparison query)
-        historical_context = None
+        current_time = datetime.now()
         
+        # Step5-6: Retrieve history for comparisons, store current record (if RAG enabled)
         if self.enable_rag and self.rag:
-            # Store current record
-            print(f"\n[Step5] Storing current record to RAG...")
-            current_time = datetime.now()
+            # History is read before the current record is queued: the record can't fall in
+            # the comparison window anyway, and the read would otherwise wait for its write
+            historical_records = self._retrieve_history(city, comparison_type, current_time) if is_comparison else None
+            
+            log.info("\n[Step%d] Storing current record to RAG...", 6 if is_comparison else 5)
             self.rag.add_record(
                 city=city,
                 camera_url=current_camera_url,
@@ -409,50 +749,62 @@ Please provide specific and accurate observations."""
                 analysis=current_analysis,
                 timestamp=current_time
             )
-            print(f"  ✓ Stored")
+            log.info("  ✓ Queued (written in the background)")
             
-            # If it's a comparison query, retrieve historical data
             if is_comparison:
-                print(f"\n[Step6] Retrieving historical data for comparison...")
-                
-                # Calculate target time
-                if comparison_type == 'yesterday':
-                    target_time = current_time - timedelta(days=1)
-                    print(f"  Comparison time: Same time yesterday ({target_time.strftime('%Y-%m-%d %H:%M')})")
-                elif comparison_type == 'last_week':
-                    target_time = current_time - timedelta(weeks=1)
-                    print(f"  Comparison time: Same time last week ({target_time.strftime('%Y-%m-%d %H:%M')})")
-                else:
-                    target_time = current_time - timedelta(days=1)
-                    print(f"  Comparison time: One day ago ({target_time.strftime('%Y-%m-%d %H:%M')})")
-                
-                # Query historical records
-                historical_records = self.rag.query_by_time(
-                    city=city,
-                    target_time=target_time,
-                    time_window=60  # within60minutes
-                )
-                
-                if historical_records:
-                    print(f"  ✓ Found {len(historical_records)} historical records")
-                    historical_context = historical_records[0]  # Using the closest record
-                else:
-                    print(f"  ✗ No historical records found, will answer based on current analysis")
-                    
-                    # Display statistics
-                    stats = self.rag.get_historical_stats(city, hours=168)  # 7 days
-                    if stats['total_records'] > 0:
-                        print(f"\n  Historical statistics (Last 7 days):")
-                        print(f"    Total records: {stats['total_records']}")
-                        print(f"    Days covered: {stats['days_covered']}")
-        
-        # Step6/7：Generate final answer
-        step_num = 7 if (self.enable_rag and is_comparison) else 5
-        print(f"\n[Step{step_num}] Generating answer...")
-        
-        if historical_context:
-            # Generate comparison answer
-            comparison_prompt = f"""Please compare and analyze the following information to answer the user's question.
+                return self._answer_compare(user_query, current_time, current_analysis, current_image_path,
+                                            historical_records)
+        
+        return self._answer_oneshot(user_query, current_analysis, current_image_path, step_num=5)
+    
+    def _retrieve_history(self, city, comparison_type, current_time):
+        """Step 5 for comparison queries: historical records around the comparison time, closest first"""
+        log.info("\n[Step5] Retrieving historical data for comparison...")
+        
+        # Calculate target time
+        if comparison_type == 'yesterday':
+            target_time = current_time - timedelta(days=1)
+            log.info("  Comparison time: Same time yesterday (%s)", target_time.strftime('%Y-%m-%d %H:%M'))
+        elif comparison_type == 'last_week':
+            target_time = current_time - timedelta(weeks=1)
+            log.info("  Comparison time: Same time last week (%s)", target_time.strftime('%Y-%m-%d %H:%M'))
+        else:
+            target_time = current_time - timedelta(days=1)
+            log.info("  Comparison time: One day ago (%s)", target_time.strftime('%Y-%m-%d %H:%M'))
+        
+        # Query historical records
+        historical_records = self.rag.query_by_time(
+            city=city,
+            target_time=target_time,
+            time_window=60  # within60minutes
+        )
+        
+        if not historical_records:
+            log.info("  ✗ No historical records found, will answer based on current analysis")
+            
+            # Display statistics
+            stats = self.rag.get_historical_stats(city, hours=168)  # 7 days
+            if stats['total_records'] > 0:
+                log.info("\n  Historical statistics (Last 7 days):")
+                log.info("    Total records: %d", stats['total_records'])
+                log.info("    Days covered: %d", stats['days_covered'])
+                for key, _ in _SQL_STATS_DISTRIBUTIONS:
+                    log.debug("    %s: %s", key, stats[key])
+        else:
+            log.info("  ✓ Found %d historical records", len(historical_records))
+        return historical_records
+    
+    def _answer_compare(self, user_query, current_time, current_analysis, current_image_path, historical_records):
+        """Step 7 for comparison queries: compare against the closest historical record"""
+        if not historical_records:
+            return self._answer_oneshot(user_query, current_analysis, current_image_path, step_num=7)
+        
+        historical_context = historical_records[0]  # Using the closest record
+        
+        # Step7：Generate comparison answer
+        log.info("\n[Step7] Generating answer...")
+        
+        comparison_prompt = f"""Please compare and analyze the following information to answer the user's question.
 
 User question: {user_query}
 
@@ -469,20 +821,23 @@ Please compare and analyze:
 4. Overall trends and differences
 
 Provide specific and quantified comparison results."""
-            
-            answer = self.call_llm_text(comparison_prompt, temperature=0.7)
-            
-            print("\n" + "="*70)
-            print("Comparison Analysis:")
-            print("="*70)
-            print(answer)
-            print("\n" + "="*70)
-            print(f"Current image: {current_image_path}")
-            print(f"Historical image: {historical_context['image_path']}")
-            print("="*70)
-        else:
-            # Generate regular answer
-            answer_prompt = f"""Please answer the user's question based on this live image analysis result.
+        
+        print("\n" + "="*70)
+        print("Comparison Analysis:")
+        print("="*70)
+        answer = self.call_llm_text(comparison_prompt, temperature=0.7, stream=True)
+        print("\n" + "="*70)
+        print(f"Current image: {current_image_path}")
+        print(f"Historical image: {historical_context['image_path']}")
+        print("="*70)
+        
+        return answer
+    
+    def _answer_oneshot(self, user_query, current_analysis, current_image_path, step_num):
+        """Final step for everything else: answer from the current image analysis alone"""
+        log.info("\n[Step%d] Generating answer...", step_num)
+        
+        answer_prompt = f"""Please answer the user's question based on this live image analysis result.
 
 User question: {user_query}
 
@@ -490,16 +845,14 @@ Image analysis:
 {current_analysis}
 
 Please provide accurate and detailed answers."""
-            
-            answer = self.call_llm_text(answer_prompt, temperature=0.7)
-            
-            print("\n" + "="*70)
-            print("Answer:")
-            print("="*70)
-            print(answer)
-            print("\n" + "="*70)
-            print(f"Reference image: {current_image_path}")
-            print("="*70)
+        
+        print("\n" + "="*70)
+        print("Answer:")
+        print("="*70)
+        answer = self.call_llm_text(answer_prompt, temperature=0.7, stream=True)
+        print("\n" + "="*70)
+        print(f"Reference image: {current_image_path}")
+        print("="*70)
         
         return answer
 
@@ -508,22 +861,36 @@ def main():
     """Main program"""
     if len(sys.argv) < 2:
         print("Usage:")
-        print("  python temporal_rag_qa.py \"your question\" [--no-rag]")
+        print("  python temporal_rag_qa.py \"your question\" [--no-rag] [--no-cache] [--verbose | --quiet]")
         print("\nExamples:")
         print("  python temporal_rag_qa.py \"Is there traffic congestion at Times Square New York now?\"")
         print("  python temporal_rag_qa.py \"Is the weather in London better today than yesterday?\"")
         print("  python temporal_rag_qa.py \"What is the traffic trend in Munich this week?\"")
         print("\nOptions:")
         print("  --no-rag: Disable RAG functionality, use original QA system")
+        print("  --no-cache: Don't read or write the on-disk LLM response cache")
+        print("  --verbose: Also show the intent's visual method and per-condition statistics")
+        print("  --quiet: Hide the RAG status messages except warnings (camera search/capture output still shows)")
         return
     
     # Parse arguments
     enable_rag = '--no-rag' not in sys.argv
-    user_query = " ".join([arg for arg in sys.argv[1:] if arg != '--no-rag'])
+    use_cache = '--no-cache' not in sys.argv
+    if '--verbose' in sys.argv:
+        configure_logging(logging.DEBUG)
+    elif '--quiet' in sys.argv:
+        configure_logging(logging.WARNING)
+    else:
+        configure_logging()
+    user_query = " ".join([arg for arg in sys.argv[1:]
+                           if arg not in ('--no-rag', '--no-cache', '--verbose', '--quiet')])
     
     # Create QA system
-    qa_system = TemporalRAGQA(enable_rag=enable_rag)
-    qa_system.answer_question_with_rag(user_query)
+    qa_system = TemporalRAGQA(enable_rag=enable_rag, use_cache=use_cache)
+    try:
+        qa_system.answer_question_with_rag(user_query)
+    finally:
+        qa_system.close()
 
 
 if __name__ == "__main__":